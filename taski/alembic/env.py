@@ -25,7 +25,10 @@ load_dotenv('.env')
 config = context.config
 
 # Установим для переменной sqlalchemy.url значение из нашего .env файла.
-config.set_main_option('sqlalchemy.url', os.environ['DATABASE_URL'])
+# Знак % экранируется: значение проходит через ConfigParser.
+config.set_main_option(
+    'sqlalchemy.url', os.environ['DATABASE_URL'].replace('%', '%%')
+)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -42,6 +45,20 @@ target_metadata = Base.metadata
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+# Объекты полнотекстового поиска создаются только миграциями и не
+# описаны в моделях, поэтому autogenerate не должен предлагать их удалить.
+FTS_TABLE_PREFIX = 'task_fts'
+FTS_OBJECTS = {
+    ('column', 'search_vector'),
+    ('index', 'ix_task_search_vector'),
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and name.startswith(FTS_TABLE_PREFIX):
+        return False
+    return (type_, name) not in FTS_OBJECTS
+
 
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
@@ -59,6 +76,7 @@ def run_migrations_offline():
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -68,7 +86,11 @@ def run_migrations_offline():
 
 
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
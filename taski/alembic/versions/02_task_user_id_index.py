@@ -0,0 +1,25 @@
+"""Task user_id index
+
+Revision ID: 02
+Revises: 01
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '02'
+down_revision = '01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_task_user_id_id', 'task', ['user_id', 'id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_task_user_id_id', table_name='task')
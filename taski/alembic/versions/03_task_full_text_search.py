@@ -0,0 +1,64 @@
+"""Task full-text search
+
+Revision ID: 03
+Revises: 02
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '03'
+down_revision = '02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE task ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', "
+            "coalesce(name, '') || ' ' || coalesce(description, ''))) STORED"
+        )
+        op.create_index(
+            'ix_task_search_vector', 'task', ['search_vector'],
+            postgresql_using='gin'
+        )
+        return
+    # SQLite: внешняя FTS5-таблица поверх task, синхронизируемая триггерами.
+    op.execute(
+        "CREATE VIRTUAL TABLE task_fts USING fts5("
+        "name, description, content='task', content_rowid='id')"
+    )
+    op.execute(
+        "CREATE TRIGGER task_fts_ai AFTER INSERT ON task BEGIN "
+        "INSERT INTO task_fts(rowid, name, description) "
+        "VALUES (new.id, new.name, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER task_fts_ad AFTER DELETE ON task BEGIN "
+        "INSERT INTO task_fts(task_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER task_fts_au AFTER UPDATE OF name, description ON task "
+        "BEGIN "
+        "INSERT INTO task_fts(task_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO task_fts(rowid, name, description) "
+        "VALUES (new.id, new.name, new.description); END"
+    )
+    op.execute("INSERT INTO task_fts(task_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_task_search_vector', table_name='task')
+        op.execute('ALTER TABLE task DROP COLUMN search_vector')
+        return
+    op.execute('DROP TRIGGER task_fts_au')
+    op.execute('DROP TRIGGER task_fts_ad')
+    op.execute('DROP TRIGGER task_fts_ai')
+    op.execute('DROP TABLE task_fts')
@@ -0,0 +1,26 @@
+"""Task tag tag_id index
+
+Revision ID: 04
+Revises: 03
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '04'
+down_revision = '03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_task_tag_tag_id_task_id', 'task_tag', ['tag_id', 'task_id'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_task_tag_tag_id_task_id', table_name='task_tag')
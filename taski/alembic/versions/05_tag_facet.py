@@ -0,0 +1,43 @@
+"""Tag facet counters
+
+Revision ID: 05
+Revises: 04
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '05'
+down_revision = '04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tag_facet',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tag_id'], ['tag.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint(
+        'user_id', 'tag_id', name='uq_tag_facet_user_id_tag_id'
+    )
+    )
+    # Заполнение счётчиков по уже существующим задачам.
+    op.execute(
+        'INSERT INTO tag_facet (user_id, tag_id, count) '
+        'SELECT task.user_id, task_tag.tag_id, count(*) '
+        'FROM task_tag JOIN task ON task.id = task_tag.task_id '
+        'WHERE task.user_id IS NOT NULL '
+        'GROUP BY task.user_id, task_tag.tag_id'
+    )
+
+
+def downgrade():
+    op.drop_table('tag_facet')
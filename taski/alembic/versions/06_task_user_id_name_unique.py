@@ -0,0 +1,64 @@
+"""Task name unique per user
+
+Revision ID: 06
+Revises: 05
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '06'
+down_revision = '05'
+branch_labels = None
+depends_on = None
+
+# В SQLite ограничение уникальности name безымянное,
+# имя для batch-режима задаётся через соглашение об именовании.
+SQLITE_NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+SQLITE_FTS_TRIGGERS = (
+    "CREATE TRIGGER task_fts_ai AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER task_fts_ad AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER task_fts_au AFTER UPDATE OF name, description ON task "
+    "BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO task_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('task_name_key', 'task', type_='unique')
+        op.create_unique_constraint(
+            'uq_task_user_id_name', 'task', ['user_id', 'name']
+        )
+        return
+    with op.batch_alter_table(
+        'task', naming_convention=SQLITE_NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.drop_constraint('uq_task_name', type_='unique')
+        batch_op.create_unique_constraint(
+            'uq_task_user_id_name', ['user_id', 'name']
+        )
+    # Пересоздание таблицы удаляет триггеры полнотекстового индекса.
+    for trigger in SQLITE_FTS_TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('uq_task_user_id_name', 'task', type_='unique')
+        op.create_unique_constraint('task_name_key', 'task', ['name'])
+        return
+    with op.batch_alter_table('task') as batch_op:
+        batch_op.drop_constraint('uq_task_user_id_name', type_='unique')
+        batch_op.create_unique_constraint('uq_task_name', ['name'])
+    for trigger in SQLITE_FTS_TRIGGERS:
+        op.execute(trigger)
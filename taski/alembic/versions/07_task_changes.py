@@ -0,0 +1,44 @@
+"""Task changes feed
+
+Revision ID: 07
+Revises: 06
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '07'
+down_revision = '06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_task_user_id_update_date_id', 'task',
+        ['user_id', 'update_date', 'id'], unique=False
+    )
+    op.create_table('task_tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_task_tombstone_user_id_deleted_at_id', 'task_tombstone',
+        ['user_id', 'deleted_at', 'id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'ix_task_tombstone_user_id_deleted_at_id',
+        table_name='task_tombstone'
+    )
+    op.drop_table('task_tombstone')
+    op.drop_index('ix_task_user_id_update_date_id', table_name='task')
@@ -0,0 +1,44 @@
+"""Idempotency keys
+
+Revision ID: 08
+Revises: 07
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '08'
+down_revision = '07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_key',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint(
+        'user_id', 'key', name='uq_idempotency_key_user_id_key'
+    )
+    )
+    op.create_index(
+        op.f('ix_idempotency_key_created_at'), 'idempotency_key',
+        ['created_at'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f('ix_idempotency_key_created_at'), table_name='idempotency_key'
+    )
+    op.drop_table('idempotency_key')
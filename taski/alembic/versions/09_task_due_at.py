@@ -0,0 +1,40 @@
+"""Task due dates and reminders
+
+Revision ID: 09
+Revises: 08
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '09'
+down_revision = '08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('task', sa.Column('due_at', sa.DateTime(), nullable=True))
+    op.add_column(
+        'task', sa.Column('reminded_at', sa.DateTime(), nullable=True)
+    )
+    op.create_index(
+        'ix_task_due_at_pending', 'task', ['due_at'], unique=False,
+        postgresql_where=sa.text('reminded_at IS NULL'),
+        sqlite_where=sa.text('reminded_at IS NULL'),
+    )
+    op.add_column(
+        'user', sa.Column('telegram_chat_id', sa.BigInteger(), nullable=True)
+    )
+
+
+def downgrade():
+    # SQLite 3.35+ удаляет колонки без пересоздания таблицы,
+    # поэтому триггеры полнотекстового индекса сохраняются.
+    op.drop_column('user', 'telegram_chat_id')
+    op.drop_index('ix_task_due_at_pending', table_name='task')
+    op.drop_column('task', 'reminded_at')
+    op.drop_column('task', 'due_at')
@@ -0,0 +1,39 @@
+"""Task FTS trigger only on name and description updates
+
+Revision ID: 10
+Revises: 09
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '10'
+down_revision = '09'
+branch_labels = None
+depends_on = None
+
+# Тело триггера как в миграциях 03 и 06: FTS-строка переписывается
+# только при изменении проиндексированных колонок.
+SQLITE_FTS_UPDATE_TRIGGER = (
+    "CREATE TRIGGER task_fts_au AFTER UPDATE OF name, description ON task "
+    "BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO task_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END"
+)
+
+
+def upgrade():
+    # В PostgreSQL search_vector - генерируемая колонка, триггера нет.
+    if op.get_bind().dialect.name == 'postgresql':
+        return
+    op.execute('DROP TRIGGER IF EXISTS task_fts_au')
+    op.execute(SQLITE_FTS_UPDATE_TRIGGER)
+
+
+def downgrade():
+    # Миграции 03 и 06 создают триггер в том же виде.
+    pass
@@ -0,0 +1,36 @@
+"""Per-user task version
+
+Revision ID: 11
+Revises: 10
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '11'
+down_revision = '10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'user',
+        sa.Column(
+            'task_version', sa.Integer(), nullable=False, server_default='0'
+        )
+    )
+    op.add_column(
+        'task',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0')
+    )
+
+
+def downgrade():
+    # SQLite 3.35+ удаляет колонки без пересоздания таблицы,
+    # поэтому триггеры полнотекстового индекса сохраняются.
+    op.drop_column('task', 'version')
+    op.drop_column('user', 'task_version')
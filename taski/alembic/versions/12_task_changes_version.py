@@ -0,0 +1,60 @@
+"""Task changes feed ordered by version
+
+Revision ID: 12
+Revises: 11
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '12'
+down_revision = '11'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'task_tombstone',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0')
+    )
+    op.create_index(
+        'ix_task_user_id_version_id', 'task',
+        ['user_id', 'version', 'id'], unique=False
+    )
+    op.drop_index('ix_task_user_id_update_date_id', table_name='task')
+    op.create_index(
+        'ix_task_tombstone_user_id_version_id', 'task_tombstone',
+        ['user_id', 'version', 'id'], unique=False
+    )
+    op.drop_index(
+        'ix_task_tombstone_user_id_deleted_at_id',
+        table_name='task_tombstone'
+    )
+    op.create_index(
+        'ix_task_tombstone_deleted_at', 'task_tombstone',
+        ['deleted_at'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'ix_task_tombstone_deleted_at', table_name='task_tombstone'
+    )
+    op.create_index(
+        'ix_task_tombstone_user_id_deleted_at_id', 'task_tombstone',
+        ['user_id', 'deleted_at', 'id'], unique=False
+    )
+    op.drop_index(
+        'ix_task_tombstone_user_id_version_id', table_name='task_tombstone'
+    )
+    op.create_index(
+        'ix_task_user_id_update_date_id', 'task',
+        ['user_id', 'update_date', 'id'], unique=False
+    )
+    op.drop_index('ix_task_user_id_version_id', table_name='task')
+    # SQLite 3.35+ удаляет колонки без пересоздания таблицы
+    op.drop_column('task_tombstone', 'version')
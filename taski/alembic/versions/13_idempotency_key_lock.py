@@ -0,0 +1,27 @@
+"""Idempotency key lease
+
+Revision ID: 13
+Revises: 12
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '13'
+down_revision = '12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'idempotency_key',
+        sa.Column('locked_until', sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column('idempotency_key', 'locked_until')
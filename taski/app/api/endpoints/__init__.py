@@ -1,3 +1,5 @@
+from .batch import router as batch_router  # noqa
+from .metrics import router as metrics_router  # noqa
 from .task import router as task_router  # noqa
 from .tag import router as tag_router  # noqa
 from .telegram_bot import router as tg_auth_router  # noqa
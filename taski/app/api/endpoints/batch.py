@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.validators import (
+    check_name_duplicate_for_task, check_task_found,
+    check_valid_name_for_task,
+)
+from app.core.db import get_async_session
+from app.core.user import current_user
+from app.crud.task import task_crud
+from app.models import User
+from app.schemas.batch import (
+    BatchCreate,
+    BatchOperationResult,
+    BatchRequest,
+    BatchResult,
+    BatchUpdate,
+)
+
+router = APIRouter()
+
+
+async def run_operation(operation, session: AsyncSession, user: User):
+    """Выполнение операции пакета без коммита."""
+    if isinstance(operation, BatchCreate):
+        await check_valid_name_for_task(operation.data)
+        async with check_name_duplicate_for_task(session):
+            return await task_crud.create(
+                operation.data, session, user, commit=False
+            )
+    if isinstance(operation, BatchUpdate):
+        if operation.data.name is not None:
+            await check_valid_name_for_task(operation.data)
+        async with check_name_duplicate_for_task(session):
+            task = await task_crud.update(
+                operation.id, operation.data, session, user, commit=False
+            )
+        return check_task_found(task)
+    task = await task_crud.remove(operation.id, session, user, commit=False)
+    return check_task_found(task)
+
+
+@router.post(
+    '/batch',
+    response_model=BatchResult,
+    response_model_exclude_none=True,
+)
+async def run_batch(
+        batch: BatchRequest,
+        session: AsyncSession = Depends(get_async_session),
+        user: User = Depends(current_user),
+):
+    """
+    Выполнение пакета операций над задачами в одной транзакции.
+
+    Операции выполняются по порядку с одним коммитом в конце.
+    Ошибка любой операции откатывает весь пакет; в ответе с ошибкой
+    указан номер операции.
+    """
+    results = []
+    for index, operation in enumerate(batch.operations):
+        try:
+            task = await run_operation(operation, session, user)
+        except HTTPException as error:
+            await session.rollback()
+            raise HTTPException(
+                status_code=error.status_code,
+                detail={'operation': index, 'detail': error.detail}
+            )
+        results.append(BatchOperationResult(
+            op=operation.op, task=task
+        ))
+    await task_crud.commit(session, user)
+    return BatchResult(results=results)
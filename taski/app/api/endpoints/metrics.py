@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics():
+    """Метрики запросов в формате Prometheus."""
+    return PlainTextResponse(
+        render_metrics(), media_type='text/plain; version=0.0.4'
+    )
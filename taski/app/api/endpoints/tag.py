@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter, Depends, HTTPException, Request, Response, status
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models import User
 from app.schemas.tag import (
     TagCreate,
     TagDB,
     TagAllDB,
+    TagFacetDB,
 )
 
+from app.api.etag import check_not_modified, make_etag
+from app.api.responses import fast_json_response
 from app.api.validators import check_name_duplicate_for_tag
+from app.core.config import settings
 from app.core.user import current_superuser, current_user
 from app.core.db import get_async_session
+from app.core.replicas import get_read_session, read_router
 from app.crud.tag import tag_crud
+from app.crud.task import task_crud
 
 
 router = APIRouter()
@@ -20,18 +29,41 @@ router = APIRouter()
     '/',
     response_model=TagAllDB,
     response_model_exclude_none=True,
-    dependencies=[Depends(current_superuser)]
 )
 async def create_new_tag(
         tag: TagCreate,
         session: AsyncSession = Depends(get_async_session),
+        user: User = Depends(current_superuser)
 ):
     """Создание объекта Tag."""
     await check_name_duplicate_for_tag(tag.title, session)
     new_tag = await tag_crud.create(tag, session)
+    read_router.pin_to_primary(user.id)
     return new_tag
 
 
+@router.get(
+    '/facets',
+    response_model=list[TagFacetDB],
+    dependencies=[Depends(current_user)]
+)
+async def get_tag_facets(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user)
+):
+    """Получение тегов пользователя с количеством задач по каждому."""
+    # Счётчики меняются только вместе с задачами пользователя
+    version = await task_crud.get_version(session, user)
+    not_modified = check_not_modified(
+        request, response, make_etag('facets', user.id, version)
+    )
+    if not_modified is not None:
+        return not_modified
+    return await tag_crud.get_facets(session, user)
+
+
 @router.get(
     '/{Tag_id}',
     response_model=TagDB,
@@ -40,7 +72,7 @@ async def create_new_tag(
 )
 async def get_task(
     task_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Получение всех объектов Donation."""
     task_from_db = await tag_crud.get(task_id, session)
@@ -53,23 +85,34 @@ async def get_task(
 
 
 @router.get(
-    '/{tags}',
+    '/',
     response_model=list[TagDB],
     response_model_exclude_none=True,
     dependencies=[Depends(current_user)]
 )
 async def get_all_tasks(
-    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
-    Получение всех объектов Task.
+    Получение всех объектов Tag.
     """
-    task_from_db = await tag_crud.get_multi(session)
+    not_modified = check_not_modified(
+        request, response, make_etag(await tag_crud.get_version(session))
+    )
+    if not_modified is not None:
+        return not_modified
+    task_from_db = await tag_crud.get_multi(
+        session, as_rows=settings.fast_json
+    )
     if task_from_db is None:
         raise HTTPException(
             status_code=404,
             detail='Задач пока нету.'
         )
+    if settings.fast_json:
+        return fast_json_response(task_from_db, response)
     return task_from_db
 
 
@@ -1,22 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import time
+from typing import AsyncIterator, Optional
+
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, Request, Response, status
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.db import get_async_session
+from app.core.replicas import get_read_session
 from app.crud.task import task_crud
 from app.models import User
 from app.schemas.task import (
+    TaskBulkError,
+    TaskBulkResult,
+    TaskChanges,
     TaskCreate,
     TaskUpdate,
     TaskDB,
 )
+from app.api.etag import check_not_modified, make_etag
+from app.api.responses import fast_json_response
+from app.api.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor,
+    set_next_page,
+)
 from app.api.validators import (
-    check_name_duplicate_for_task, check_task_exists,
+    check_name_duplicate_for_task, check_task_exists, check_task_found,
     check_valid_name_for_task,
 )
 from app.core.user import current_user
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPES = ('application/x-ndjson', 'application/ndjson')
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CSV_FIELDS = (
+    'id', 'name', 'description', 'create_date', 'update_date', 'tags',
+    'due_at'
+)
+
+
+async def read_bulk_rows(request: Request) -> AsyncIterator[TaskCreate]:
+    """
+    Построчное чтение тела запроса пакетного создания задач.
+
+    Тело в формате NDJSON читается потоком, JSON-массив - целиком.
+    Вместо строки, не прошедшей валидацию, отдаётся исключение.
+    """
+    content_type = request.headers.get('content-type', '')
+    if content_type.split(';')[0].strip() in NDJSON_MEDIA_TYPES:
+        buffer = b''
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b'\n')
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+    try:
+        rows = await request.json()
+    except ValueError:
+        rows = None
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Ожидается JSON-массив задач или NDJSON!'
+        )
+    for row in rows:
+        yield row
+
+
+async def parse_bulk_row(row) -> TaskCreate:
+    """Валидация строки пакетного создания задач."""
+    if isinstance(row, bytes):
+        task = TaskCreate.parse_raw(row)
+    else:
+        task = TaskCreate.parse_obj(row)
+    await check_valid_name_for_task(task)
+    return task
+
 
 @router.post(
     '/',
@@ -33,12 +104,238 @@ async def create_new_task(
     Создание объекта Task с валидацией входных данных.
     """
     await check_valid_name_for_task(task)
-    await check_name_duplicate_for_task(task.name, session, user)
-    new_task = await task_crud.create(task, session, user)
-    await session.refresh(new_task)
+    async with check_name_duplicate_for_task(session):
+        new_task = await task_crud.create(task, session, user)
     return new_task
 
 
+@router.post(
+    '/bulk',
+    response_model=TaskBulkResult,
+    dependencies=[Depends(current_user)],
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'application/json': {
+                    'schema': {
+                        'type': 'array',
+                        'items': {'$ref': '#/components/schemas/TaskCreate'},
+                    },
+                },
+                'application/x-ndjson': {
+                    'schema': {'$ref': '#/components/schemas/TaskCreate'},
+                },
+            },
+        },
+    },
+)
+async def create_tasks_bulk(
+        request: Request,
+        session: AsyncSession = Depends(get_async_session),
+        user: User = Depends(current_user),
+):
+    """
+    Пакетное создание объектов Task из JSON-массива или NDJSON.
+
+    Задачи сохраняются пачками по одной транзакции на пачку,
+    ошибки отдельных строк возвращаются без отмены всего пакета.
+    """
+    result = TaskBulkResult()
+    tag_ids = {}
+    chunk = []
+
+    async def save_chunk():
+        ids = await task_crud.create_many(
+            [task for _, task in chunk], session, user, tag_ids
+        )
+        for (row, _), task_id in zip(chunk, ids):
+            if task_id is None:
+                result.errors.append(TaskBulkError(
+                    row=row, detail='Проект с таким именем уже существует!'
+                ))
+            else:
+                result.ids.append(task_id)
+        chunk.clear()
+
+    row = 0
+    async for raw in read_bulk_rows(request):
+        try:
+            chunk.append((row, await parse_bulk_row(raw)))
+        except ValidationError as error:
+            result.errors.append(TaskBulkError(row=row, detail=error.errors()))
+        except HTTPException as error:
+            result.errors.append(TaskBulkError(row=row, detail=error.detail))
+        row += 1
+        if len(chunk) >= settings.bulk_chunk_size:
+            await save_chunk()
+    if chunk:
+        await save_chunk()
+    # Ошибки пачки добавляются после ошибок разбора следующих строк
+    result.errors.sort(key=lambda error: error.row)
+    result.created = len(result.ids)
+    return result
+
+
+async def encode_ndjson(tasks: AsyncIterator) -> AsyncIterator[str]:
+    """Построчная сериализация задач в NDJSON."""
+    async for task in tasks:
+        yield TaskDB.from_orm(task).json(exclude_none=True) + '\n'
+
+
+async def encode_csv(tasks: AsyncIterator) -> AsyncIterator[str]:
+    """Построчная сериализация задач в CSV."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    async for task in tasks:
+        row = TaskDB.from_orm(task).dict()
+        row['tags'] = ','.join(row['tags'] or [])
+        writer.writerow([row[field] for field in CSV_FIELDS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    dependencies=[Depends(current_user)]
+)
+async def export_tasks(
+    export_format: str = Query(
+        'ndjson', alias='format', regex='^(ndjson|csv)$'
+    ),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user)
+):
+    """
+    Выгрузка всех объектов Task пользователя в NDJSON или CSV.
+
+    Задачи читаются из БД и отдаются клиенту потоком, по мере чтения.
+    """
+    tasks = task_crud.stream_multi(session, user, settings.export_chunk_size)
+    encode = encode_csv if export_format == 'csv' else encode_ndjson
+    return StreamingResponse(
+        encode(tasks),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition':
+                f'attachment; filename="tasks.{export_format}"'
+        }
+    )
+
+
+@router.get(
+    '/search',
+    response_model=list[TaskDB],
+    response_model_exclude_none=True,
+    dependencies=[Depends(current_user)]
+)
+async def search_tasks(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    after: Optional[str] = Query(
+        None, description='Курсор следующей страницы из заголовка Link'
+    ),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user)
+):
+    """
+    Полнотекстовый поиск объектов Task по названию и описанию.
+
+    Ссылка на следующую страницу возвращается в заголовке Link.
+    """
+    if not q.strip():
+        return []
+    offset = decode_cursor(after, offset=int).get('offset', 0)
+    if offset < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Некорректный курсор!'
+        )
+    tasks = await task_crud.search(
+        q, session, user, offset=offset, limit=limit + 1
+    )
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor(offset=offset + limit)
+    set_next_page(request, response, next_cursor)
+    return tasks
+
+
+def decode_change_position(position) -> Optional[tuple[int, int]]:
+    """Позиция потока изменений из курсора: (версия, id)."""
+    if position is None:
+        return None
+    if len(position) != 2 or not all(
+        isinstance(value, int) for value in position
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Некорректный курсор!'
+        )
+    return tuple(position)
+
+
+@router.get(
+    '/changes',
+    response_model=TaskChanges,
+    response_model_exclude_none=True,
+    dependencies=[Depends(current_user)]
+)
+async def get_task_changes(
+    since: Optional[str] = Query(
+        None,
+        description='Курсор из предыдущего ответа; без него - все задачи'
+    ),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user)
+):
+    """
+    Получение задач, созданных, изменённых или удалённых после курсора.
+
+    Клиент сохраняет cursor из ответа и передаёт его в следующий запрос;
+    при has_more изменения нужно дочитать сразу. Курсор старше срока
+    хранения записей об удалении отклоняется с кодом 410: удаления
+    за это время могли быть забыты, задачи нужно загрузить заново.
+    """
+    position = decode_cursor(since, u=(list, type(None)), d=(list, type(None)))
+    issued_at = position.get('t')
+    if since and (
+        not isinstance(issued_at, int) or
+        issued_at < time.time() - settings.task_tombstone_retention_seconds
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail='Курсор устарел, загрузите задачи заново!'
+        )
+    updated_after = decode_change_position(position.get('u'))
+    deleted_after = decode_change_position(position.get('d'))
+    updated, deleted, has_more = await task_crud.get_changes(
+        session, user, updated_after, deleted_after, limit
+    )
+    if updated:
+        updated_after = (updated[-1].version, updated[-1].id)
+    if deleted:
+        deleted_after = (deleted[-1].version, deleted[-1].id)
+    cursor = encode_cursor(
+        u=None if updated_after is None else list(updated_after),
+        d=None if deleted_after is None else list(deleted_after),
+        t=int(time.time())
+    )
+    return TaskChanges(
+        updated=updated,
+        deleted=[tombstone.task_id for tombstone in deleted],
+        cursor=cursor,
+        has_more=has_more
+    )
+
+
 @router.get(
     '/',
     response_model=list[TaskDB],
@@ -46,21 +343,103 @@ async def create_new_task(
     dependencies=[Depends(current_user)]
 )
 async def get_all_tasks(
-    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    response: Response,
+    after: Optional[str] = Query(
+        None, description='Курсор следующей страницы из заголовка Link'
+    ),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_user)
 ):
     """
-    Получение всех объектов Task.
+    Получение объектов Task постранично.
+
+    Ссылка на следующую страницу возвращается в заголовке Link.
+    Если задачи не менялись, на If-None-Match отвечает 304.
     """
-    task_from_db = await task_crud.get_multi(session, user)
+    after_id = decode_cursor(after, id=int).get('id')
+    version = await task_crud.get_version(session, user)
+    not_modified = check_not_modified(
+        request, response, make_etag(user.id, after_id, limit, version)
+    )
+    if not_modified is not None:
+        return not_modified
+    task_from_db = await task_crud.get_multi(
+        session, user, after_id=after_id, limit=limit + 1,
+        as_rows=settings.fast_json
+    )
     if task_from_db is None:
         raise HTTPException(
             status_code=404,
             detail='Задач пока нету.'
         )
+    next_cursor = None
+    if len(task_from_db) > limit:
+        task_from_db = task_from_db[:limit]
+        last = task_from_db[-1]
+        next_cursor = encode_cursor(
+            id=last['id'] if settings.fast_json else last.id
+        )
+    set_next_page(request, response, next_cursor)
+    if settings.fast_json:
+        return fast_json_response(task_from_db, response)
     return task_from_db
 
 
+@router.get(
+    '/by_tag',
+    response_model=list[TaskDB],
+    response_model_exclude_none=True,
+    dependencies=[Depends(current_user)]
+)
+async def get_tasks_by_tags(
+    tags: list[str] = Query(..., min_items=1),
+    mode: str = Query(
+        'all', regex='^(all|any)$',
+        description='all - задачи со всеми тегами, any - с любым из них'
+    ),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user)
+):
+    """
+    Получение задач по нескольким тегам.
+    """
+    tasks = await task_crud.get_tasks_by_tags(
+        tags, session, user, match_all=mode == 'all',
+        as_rows=settings.fast_json
+    )
+    if not tasks:
+        raise HTTPException(
+            status_code=404,
+            detail='Задачи с таким тегом не найдены.'
+        )
+    if settings.fast_json:
+        return fast_json_response(tasks)
+    return tasks
+
+
+@router.get(
+    '/by_name/{name:path}',
+    response_model=TaskDB,
+    response_model_exclude_none=True,
+    dependencies=[Depends(current_user)]
+)
+async def get_task_by_name(
+    name: str,
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user)
+):
+    """Получение объекта Task по названию."""
+    task = await task_crud.get_by_name(name, session, user)
+    if task is None:
+        raise HTTPException(
+            status_code=404,
+            detail='Задача с таким названием не найдена.'
+        )
+    return task
+
+
 @router.get(
     '/{task_id}',
     response_model=TaskDB,
@@ -69,18 +448,20 @@ async def get_all_tasks(
 )
 async def get_task(
     task_id: int,
-    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_user)
 ):
     """Получение объекта Task."""
-    await check_task_exists(task_id, session, user)
-    task_from_db = await task_crud.get(task_id, session, user)
-    if task_from_db is None:
-        raise HTTPException(
-            status_code=404,
-            detail='Задач пока нету.'
+    version = await task_crud.get_version(session, user, obj_id=task_id)
+    if version is not None:
+        not_modified = check_not_modified(
+            request, response, make_etag(user.id, task_id, version)
         )
-    return task_from_db
+        if not_modified is not None:
+            return not_modified
+    return await check_task_exists(task_id, session, user)
 
 
 @router.get(
@@ -91,18 +472,22 @@ async def get_task(
 )
 async def get_tasks_by_tag(
     tag: str,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_user)
 ):
     """
     Получение задач по тегу.
     """
-    tasks = await task_crud.get_tasks_by_tag(tag, session, user)
+    tasks = await task_crud.get_tasks_by_tags(
+        [tag], session, user, as_rows=settings.fast_json
+    )
     if not tasks:
         raise HTTPException(
             status_code=404,
             detail='Задачи с таким тегом не найдены.'
         )
+    if settings.fast_json:
+        return fast_json_response(tasks)
     return tasks
 
 
@@ -121,18 +506,18 @@ async def partially_update_task(
     """
     Частичное обновление данных для Task c валидацией.
     """
-    task = await check_task_exists(task_id, session, user)
-
     if obj_in.name is not None:
         await check_valid_name_for_task(obj_in)
-        await check_name_duplicate_for_task(obj_in.name, session)
 
-    task = await task_crud.update(task, obj_in, session, user)
-    return task
+    async with check_name_duplicate_for_task(session):
+        task = await task_crud.update(task_id, obj_in, session, user)
+    return check_task_found(task)
 
 
 @router.delete(
     '/{task_id}',
+    response_model=TaskDB,
+    response_model_exclude_none=True,
     dependencies=[Depends(current_user)]
 )
 async def remove_task(
@@ -143,6 +528,5 @@ async def remove_task(
     """
     Удаление объекта Task.
     """
-    task = await check_task_exists(task_id, session, user)
-    task = await task_crud.remove(task, session, user)
-    return task
+    task = await task_crud.remove(task_id, session, user)
+    return check_task_found(task)
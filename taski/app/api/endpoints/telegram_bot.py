@@ -1,23 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.db import get_async_session
+from app.core.user import current_user, invalidate_user
 from app.models.user import User
+from app.schemas.user import TelegramLink
 
 router = APIRouter()
 
 
 @router.post("/")
 async def link_telegram_account(
-    telegram_username: str,
-    email: str,
+    link: TelegramLink,
     session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_user),
 ):
-    user = await session.get(User, email)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    user.telegram_username = telegram_username
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    """Привязка Telegram-аккаунта к текущему пользователю."""
+    try:
+        await session.execute(
+            update(User).where(User.id == user.id).values(
+                **link.dict(exclude_none=True)
+            )
+        )
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=400, detail="Telegram account already linked"
+        )
+    invalidate_user(user.id)
     return {"message": "Telegram account linked successfully"}
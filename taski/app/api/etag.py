@@ -0,0 +1,36 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """Слабый ETag из значений, определяющих содержимое ответа."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def check_not_modified(
+        request: Request,
+        response: Response,
+        etag: str
+) -> Optional[Response]:
+    """
+    Проверка заголовка If-None-Match.
+
+    Возвращает ответ 304, если у клиента актуальная версия,
+    иначе добавляет ETag в заголовки ответа и возвращает None.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {
+            tag.strip().removeprefix('W/')
+            for tag in if_none_match.split(',')
+        }
+        if '*' in tags or etag.removeprefix('W/') in tags:
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={'ETag': etag}
+            )
+    response.headers['ETag'] = etag
+    return None
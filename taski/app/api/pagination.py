@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(**position) -> str:
+    """Кодирование позиции выборки в непрозрачный курсор."""
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], **fields: type) -> dict:
+    """
+    Раскодирование курсора, полученного от клиента.
+
+    fields задаёт обязательные поля курсора и их типы.
+    """
+    if not cursor:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, ValueError):
+        position = None
+    if not isinstance(position, dict) or not all(
+        isinstance(position.get(name), field_type)
+        for name, field_type in fields.items()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Некорректный курсор!'
+        )
+    return position
+
+
+def set_next_page(
+        request: Request,
+        response: Response,
+        next_cursor: Optional[str]
+) -> None:
+    """Добавление ссылки на следующую страницу в заголовки ответа."""
+    if next_cursor is None:
+        return
+    next_url = request.url.include_query_params(after=next_cursor)
+    response.headers['Link'] = f'<{next_url}>; rel="next"'
+    response.headers['X-Next-Cursor'] = next_cursor
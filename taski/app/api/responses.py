@@ -0,0 +1,22 @@
+from typing import Optional
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+
+def fast_json_response(
+        content,
+        response: Optional[Response] = None
+) -> ORJSONResponse:
+    """
+    Ответ, сериализованный orjson без проверки response_model.
+
+    Заголовки, выставленные эндпоинтом в response, переносятся в ответ.
+    """
+    fast_response = ORJSONResponse(content)
+    if response is not None:
+        fast_response.raw_headers.extend(
+            header for header in response.raw_headers
+            if header[0] != b'content-length'
+        )
+    return fast_response
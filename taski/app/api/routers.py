@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
 from app.api.endpoints import (
+    batch_router,
+    metrics_router,
     task_router,
     tag_router,
     user_router
@@ -16,4 +18,6 @@ main_router.include_router(
     tags=['Tag']
 )
 
+main_router.include_router(batch_router, tags=['Batch'])
 main_router.include_router(user_router)
+main_router.include_router(metrics_router, tags=['Metrics'])
@@ -1,21 +1,30 @@
+import contextlib
+from typing import Optional
+
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.task import task_crud
+from app.crud.task import is_name_conflict, task_crud
 from app.crud.tag import tag_crud
 from app.models import Task, User
 
 
-async def check_name_duplicate_for_task(
-        task_name: str,
-        session: AsyncSession,
-        user: User
-) -> None:
-    """Проверка на совпадение имени в БД."""
-    task_id = await task_crud.get_task_id_by_name(
-        task_name, session, user
-    )
-    if task_id:
+@contextlib.asynccontextmanager
+async def check_name_duplicate_for_task(session: AsyncSession):
+    """
+    Проверка на совпадение имени в БД.
+
+    Нарушение уникальности (user_id, name) при записи задачи
+    превращается в ошибку 400 без предварительного запроса,
+    остальные ошибки целостности пробрасываются дальше.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        await session.rollback()
+        if not is_name_conflict(error):
+            raise
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Проект с таким именем уже существует!",
@@ -46,6 +55,11 @@ async def check_task_exists(
     task = await task_crud.get(
         task_id, session, user
     )
+    return check_task_found(task)
+
+
+def check_task_found(task: Optional[Task]) -> Task:
+    """Проверка, что задача найдена."""
     if task is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,2 +1,4 @@
 from app.core.db import Base  # noqa
-from app.models import Tag, Task, User  # noqa
\ No newline at end of file
+from app.models import (  # noqa
+    IdempotencyKey, Tag, TagFacet, Task, TaskTombstone, User
+)
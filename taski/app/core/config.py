@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseSettings, EmailStr
 
@@ -7,9 +7,50 @@ class Settings(BaseSettings):
     """Настройки проекта."""
     app_title: str
     database_url: str
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    database_pool_recycle: int = 1800
+    database_pool_pre_ping: bool = True
+    database_statement_cache_size: int = 100
+    database_replica_urls: list[str] = []
+    database_replica_retry_seconds: float = 30
+    database_read_your_writes_seconds: float = 5
     secret: str = 'SECRET'
     first_superuser_email: Optional[EmailStr] = None
     first_superuser_password: Optional[str] = None
+    password_hash_algorithm: Literal['argon2', 'bcrypt'] = 'argon2'
+    password_hash_workers: int = 2
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+    bcrypt_rounds: int = 12
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 60
+    # Префикс пути -> (токенов в секунду, размер корзины)
+    rate_limits: dict[str, tuple[float, int]] = {
+        '/auth': (1, 10),
+        '/task': (20, 100),
+        '/tag': (20, 100),
+        # Пакет выполняет до 100 операций с задачами в одной транзакции
+        '/batch': (0.5, 5),
+    }
+    rate_limit_max_keys: int = 100000
+    fast_json: bool = False
+    tag_cache_size: int = 100000
+    tag_cache_sync_seconds: float = 60
+    bulk_chunk_size: int = 500
+    export_chunk_size: int = 1000
+    idempotency_ttl_seconds: float = 86400
+    # Срок резерва ключа: после него повтор выполняется заново
+    idempotency_lock_seconds: float = 60
+    # Курсор /task/changes старше срока хранения записей об удалении
+    # отклоняется: клиент должен загрузить задачи заново
+    task_tombstone_retention_seconds: float = 2592000
+    telegram_bot_token: Optional[str] = None
+    reminder_window_seconds: float = 300
+    reminder_reload_seconds: float = 60
+    reminder_batch_size: int = 1000
 
     class Config:
         env_file = '.env'
@@ -1,8 +1,15 @@
+from functools import partial
+from typing import Callable
+
 from sqlalchemy import Column, Integer
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, AsyncSession, create_async_engine
+)
 from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import InstrumentedPool, instrument_engine
 
 
 class PreBase:
@@ -17,9 +24,61 @@ class PreBase:
 
 Base = declarative_base(cls=PreBase)
 
-engine = create_async_engine(settings.database_url)
 
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession)
+def get_engine_options(database_url: str) -> dict:
+    """Параметры пула соединений для create_async_engine."""
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (
+        None, '', ':memory:'
+    ):
+        return {}
+    options = dict(
+        poolclass=InstrumentedPool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=settings.database_pool_pre_ping,
+    )
+    if url.get_driver_name() == 'asyncpg':
+        options['connect_args'] = {
+            'prepared_statement_cache_size':
+                settings.database_statement_cache_size,
+        }
+    return options
+
+
+def create_engine(database_url: str, label: str = 'primary') -> AsyncEngine:
+    """Движок БД с пулом из настроек и сбором метрик."""
+    engine = create_async_engine(
+        database_url, **get_engine_options(database_url)
+    )
+    instrument_engine(engine, label=label)
+    return engine
+
+
+class LazySessionmaker(sessionmaker):
+    """
+    Фабрика сессий, создающая движок при первой сессии.
+
+    Импорт приложения не загружает драйвер БД и не создаёт пул.
+    """
+
+    def __init__(self, engine_factory: Callable[[], AsyncEngine], **kw):
+        super().__init__(**kw)
+        self.engine_factory = engine_factory
+
+    def __call__(self, **local_kw):
+        if self.kw.get('bind') is None:
+            self.configure(bind=self.engine_factory())
+        return super().__call__(**local_kw)
+
+
+AsyncSessionLocal = LazySessionmaker(
+    partial(create_engine, settings.database_url),
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
 
 
 async def get_async_session():
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import re
+
+from app.core.db import AsyncSessionLocal
+from app.core.user import get_jwt_strategy
+from app.crud.idempotency import idempotency_crud
+
+IDEMPOTENCY_HEADER = b'idempotency-key'
+# Метод -> шаблон пути запросов, повтор которых не выполняется заново
+IDEMPOTENT_ROUTES = {
+    'POST': re.compile(r'/(task/|batch)$'),
+    'PATCH': re.compile(r'/task/\d+$'),
+    'DELETE': re.compile(r'/task/\d+$'),
+}
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI-middleware для повторов запросов с заголовком Idempotency-Key.
+
+    Первый ответ с кодом меньше 500 сохраняется в таблице
+    idempotency_key, повтор запроса с тем же ключом получает его
+    без выполнения эндпоинта. Тот же ключ с другим телом запроса -
+    ошибка 422, повтор во время выполнения первого запроса - 409.
+    Если первый запрос не завершился за idempotency_lock_seconds
+    (например, воркер упал), повтор выполняется заново.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        route = IDEMPOTENT_ROUTES.get(scope['method'])
+        headers = dict(scope['headers'])
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None or route is None or not route.match(scope['path']):
+            await self.app(scope, receive, send)
+            return
+        key = key.decode('latin-1')
+        if len(key) > MAX_KEY_LENGTH:
+            await self.respond(
+                send, 422, 'Слишком длинный ключ идемпотентности!'
+            )
+            return
+        user_id = self.user_id(headers)
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await self.read_body(receive)
+        fingerprint = hashlib.sha256(b'\n'.join((
+            scope['method'].encode(),
+            scope['path'].encode(),
+            scope['query_string'],
+            body,
+        ))).hexdigest()
+        locked_until = idempotency_crud.new_lease()
+        async with AsyncSessionLocal() as session:
+            stored = await idempotency_crud.reserve(
+                user_id, key, fingerprint, locked_until, session
+            )
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                await self.respond(
+                    send, 422,
+                    'Ключ идемпотентности использован с другим запросом!'
+                )
+            elif stored.status_code is None:
+                await self.respond(
+                    send, 409, 'Запрос с этим ключом ещё выполняется!'
+                )
+            else:
+                await self.replay(send, stored.status_code, stored.body)
+            return
+
+        body_received = False
+
+        async def receive_body():
+            nonlocal body_received
+            if body_received:
+                return await receive()
+            body_received = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        status_code = None
+        chunks = []
+
+        async def send_and_store(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_store)
+        except BaseException:
+            async with AsyncSessionLocal() as session:
+                await idempotency_crud.release(
+                    user_id, key, locked_until, session
+                )
+            raise
+        async with AsyncSessionLocal() as session:
+            if status_code is not None and status_code < 500:
+                await idempotency_crud.save(
+                    user_id, key, locked_until, status_code,
+                    b''.join(chunks), session
+                )
+            else:
+                await idempotency_crud.release(
+                    user_id, key, locked_until, session
+                )
+
+    @staticmethod
+    def user_id(headers: dict):
+        scheme, _, token = headers.get(
+            b'authorization', b''
+        ).decode('latin-1').partition(' ')
+        if scheme.lower() != 'bearer':
+            return None
+        return get_jwt_strategy().read_user_id(token)
+
+    @staticmethod
+    async def read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] != 'http.request':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    async def replay(
+            send,
+            status_code: int,
+            body: bytes,
+            replayed: bool = True
+    ) -> None:
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ]
+        if replayed:
+            headers.append((b'idempotent-replayed', b'true'))
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': headers,
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    @classmethod
+    async def respond(cls, send, status_code: int, detail: str) -> None:
+        body = json.dumps({'detail': detail}, ensure_ascii=False).encode()
+        await cls.replay(send, status_code, body, replayed=False)
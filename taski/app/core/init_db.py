@@ -2,10 +2,12 @@ import contextlib
 
 from fastapi_users.exceptions import UserAlreadyExists
 from pydantic import EmailStr
+from sqlalchemy import func, select
 
 from app.core.config import settings
-from app.core.db import get_async_session
+from app.core.db import AsyncSessionLocal, get_async_session
 from app.core.user import get_user_db, get_user_manager
+from app.models import User
 from app.schemas.user import UserCreate
 
 get_async_session_context = contextlib.asynccontextmanager(get_async_session)
@@ -32,14 +34,25 @@ async def create_user(
         pass
 
 
+async def user_exists(email: EmailStr) -> bool:
+    """Проверка пользователя одним запросом, без менеджера пользователей."""
+    async with AsyncSessionLocal() as session:
+        user_id = await session.execute(
+            select(User.id).where(func.lower(User.email) == email.lower())
+        )
+        return user_id.first() is not None
+
+
 async def create_first_superuser():
+    """Создание первого суперпользователя, если его ещё нет."""
     if (
-        settings.first_superuser_email is not None and
-        settings.first_superuser_password is not None
+        settings.first_superuser_email is None or
+        settings.first_superuser_password is None or
+        await user_exists(settings.first_superuser_email)
     ):
-        """Создание первого суперпользователя."""
-        await create_user(
-            email=settings.first_superuser_email,
-            password=settings.first_superuser_password,
-            is_superuser=True,
-        )
+        return
+    await create_user(
+        email=settings.first_superuser_email,
+        password=settings.first_superuser_password,
+        is_superuser=True,
+    )
@@ -0,0 +1,300 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class QueryStats:
+    """Счётчики SQL-запросов одного HTTP-запроса."""
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+request_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    'request_query_stats', default=None
+)
+
+
+def format_labels(labelnames: tuple, labels: tuple) -> str:
+    return ','.join(
+        f'{name}="{value}"' for name, value in zip(labelnames, labels)
+    )
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus."""
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            buckets: tuple,
+            labelnames: tuple = ('method', 'route')
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labelnames = labelnames
+        self.series = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0, 0.0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self) -> list[str]:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        for labels, (buckets, count, total) in self.series.items():
+            labels = format_labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, buckets):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+class Gauge:
+    """Метрика, значение которой вычисляется в момент выгрузки."""
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: tuple,
+            kind: str = 'gauge'
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.kind = kind
+        self.functions = {}
+
+    def set_function(self, labels: tuple, function: Callable[[], float]):
+        self.functions[labels] = function
+
+    def render(self) -> list[str]:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for labels, function in self.functions.items():
+            labels = format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}{{{labels}}} {function()}')
+        return lines
+
+
+request_duration = Histogram(
+    'taski_request_duration_seconds',
+    'Время обработки HTTP-запроса.',
+    LATENCY_BUCKETS,
+)
+request_db_duration = Histogram(
+    'taski_request_db_duration_seconds',
+    'Суммарное время SQL-запросов за HTTP-запрос.',
+    LATENCY_BUCKETS,
+)
+request_db_queries = Histogram(
+    'taski_request_db_queries',
+    'Количество SQL-запросов за HTTP-запрос.',
+    QUERY_COUNT_BUCKETS,
+)
+pool_checkout_wait = Histogram(
+    'taski_db_pool_checkout_wait_seconds',
+    'Время ожидания соединения из пула.',
+    LATENCY_BUCKETS,
+    labelnames=('pool',),
+)
+pool_size = Gauge(
+    'taski_db_pool_size', 'Постоянный размер пула.', ('pool',)
+)
+pool_checked_out = Gauge(
+    'taski_db_pool_checked_out', 'Выданные из пула соединения.', ('pool',)
+)
+pool_overflow = Gauge(
+    'taski_db_pool_overflow', 'Соединения сверх размера пула.', ('pool',)
+)
+pool_waiters = Gauge(
+    'taski_db_pool_waiters', 'Запросы, ожидающие соединения.', ('pool',)
+)
+pool_timeouts = Gauge(
+    'taski_db_pool_timeouts_total',
+    'Ошибки ожидания соединения из пула.',
+    ('pool',),
+    kind='counter',
+)
+METRICS = (
+    request_duration,
+    request_db_duration,
+    request_db_queries,
+    pool_checkout_wait,
+    pool_size,
+    pool_checked_out,
+    pool_overflow,
+    pool_waiters,
+    pool_timeouts,
+)
+
+
+def render_metrics() -> str:
+    """Все метрики процесса в текстовом формате Prometheus."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул соединений, считающий ожидающих и время ожидания."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+        self.timeouts = 0
+        self.label = 'primary'
+
+    def connect(self):
+        self.waiters += 1
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiters -= 1
+            pool_checkout_wait.observe(
+                (self.label,), time.perf_counter() - started
+            )
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.label = self.label
+        register_pool(pool)
+        return pool
+
+
+def register_pool(pool: InstrumentedPool) -> None:
+    """Выгрузка состояния пула в метрики."""
+    labels = (pool.label,)
+    pool_size.set_function(labels, pool.size)
+    pool_checked_out.set_function(labels, pool.checkedout)
+    pool_overflow.set_function(labels, lambda: max(pool.overflow(), 0))
+    pool_waiters.set_function(labels, lambda: pool.waiters)
+    pool_timeouts.set_function(labels, lambda: pool.timeouts)
+
+
+def instrument_engine(engine, label: str = 'primary') -> None:
+    """
+    Подсчёт SQL-запросов и их времени для текущего HTTP-запроса.
+
+    Если движок использует InstrumentedPool, его состояние
+    выгружается в метрики с меткой pool=label.
+    """
+    if isinstance(engine.pool, InstrumentedPool):
+        engine.pool.label = label
+        register_pool(engine.pool)
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context,
+                              executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context,
+                             executemany):
+        started = conn.info['query_start'].pop()
+        stats = request_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += time.perf_counter() - started
+
+    @event.listens_for(engine.sync_engine, 'handle_error')
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_start'):
+            conn.info['query_start'].pop()
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware для сбора метрик запросов.
+
+    Добавляет в ответ заголовки X-DB-Queries и Server-Timing
+    и пополняет гистограммы по шаблону маршрута.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.route_paths = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = request_query_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                elapsed = time.perf_counter() - started
+                headers = list(message.get('headers', []))
+                headers.append((b'x-db-queries', str(stats.count).encode()))
+                headers.append((
+                    b'server-timing',
+                    'db;dur={:.1f}, app;dur={:.1f}'.format(
+                        stats.duration * 1000, elapsed * 1000
+                    ).encode()
+                ))
+                message['headers'] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_query_stats.reset(token)
+            labels = (scope['method'], self.route_path(scope))
+            request_duration.observe(labels, time.perf_counter() - started)
+            request_db_duration.observe(labels, stats.duration)
+            request_db_queries.observe(labels, stats.count)
+
+    def route_path(self, scope) -> str:
+        """Шаблон пути маршрута, обработавшего запрос."""
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        path = self.route_paths.get(endpoint)
+        if path is None:
+            path = next(
+                (
+                    route.path for route in scope['app'].routes
+                    if getattr(route, 'endpoint', None) is endpoint
+                ),
+                'unmatched'
+            )
+            self.route_paths[endpoint] = path
+        return path
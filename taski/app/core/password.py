@@ -0,0 +1,62 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from app.core.config import settings
+
+
+def get_password_hash() -> PasswordHash:
+    """
+    Алгоритмы хэширования паролей.
+
+    Первым идёт алгоритм из настроек: им хэшируются новые пароли,
+    остальные нужны для проверки старых хэшей.
+    """
+    hashers = {
+        'argon2': Argon2Hasher(
+            time_cost=settings.argon2_time_cost,
+            memory_cost=settings.argon2_memory_cost,
+            parallelism=settings.argon2_parallelism,
+        ),
+        'bcrypt': BcryptHasher(rounds=settings.bcrypt_rounds),
+    }
+    current = hashers.pop(settings.password_hash_algorithm)
+    return PasswordHash((current, *hashers.values()))
+
+
+password_helper = PasswordHelper(get_password_hash())
+
+# argon2-cffi и bcrypt отпускают GIL, поэтому хватает потоков;
+# размер пула ограничивает число одновременных хэширований
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix='password-hash',
+)
+
+
+async def hash_password(password: str) -> str:
+    """Хэширование пароля вне event loop."""
+    return await asyncio.get_running_loop().run_in_executor(
+        password_executor, password_helper.hash, password
+    )
+
+
+async def verify_and_update_password(
+        password: str,
+        hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Проверка пароля вне event loop.
+
+    Вторым значением возвращается новый хэш, если изменились
+    алгоритм или его параметры.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        password_executor, password_helper.verify_and_update,
+        password, hashed_password
+    )
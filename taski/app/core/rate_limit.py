@@ -0,0 +1,149 @@
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+from urllib.parse import parse_qs
+
+from app.core.config import settings
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.user import token_cache
+
+LOGIN_PATH = '/auth/jwt/login'
+
+
+class TokenBuckets:
+    """
+    Набор корзин токенов: rate токенов в секунду, не больше burst.
+
+    Корзины хранятся в порядке последнего обращения. Корзина,
+    простоявшая burst / rate секунд, снова полна и ничем не отличается
+    от новой, поэтому такие корзины удаляются; размер набора
+    ограничен max_keys.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.idle_timeout = burst / rate
+        self.buckets = OrderedDict()
+
+    def acquire(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Списание токена. Возвращает 0 или время ожидания в секундах."""
+        if now is None:
+            now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            tokens = self.burst
+        else:
+            tokens = min(
+                self.burst, bucket[0] + (now - bucket[1]) * self.rate
+            )
+            self.buckets.move_to_end(key)
+        if tokens >= 1:
+            self.buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self.buckets[key] = (tokens, now)
+            wait = (1 - tokens) / self.rate
+        self.evict(now)
+        return wait
+
+    def evict(self, now: float) -> None:
+        buckets = self.buckets
+        while len(buckets) > self.max_keys:
+            buckets.popitem(last=False)
+        # За один вызов удаляется не больше двух корзин: O(1) амортизированно
+        for _ in range(2):
+            if not buckets:
+                break
+            key, (_, updated) = next(iter(buckets.items()))
+            if now - updated < self.idle_timeout:
+                break
+            del buckets[key]
+
+
+class RateLimitMiddleware:
+    """
+    ASGI-middleware, ограничивающее частоту запросов.
+
+    Лимиты задаются в settings.rate_limits для префиксов путей.
+    Запросы с известным токеном считаются по пользователю,
+    остальные - по IP-адресу клиента. Входы считаются по IP-адресу
+    и имени пользователя: пользователи Telegram-бота входят с одного
+    адреса и не должны делить одну корзину.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.groups = [
+            (prefix, TokenBuckets(rate, burst, settings.rate_limit_max_keys))
+            for prefix, (rate, burst) in settings.rate_limits.items()
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        path = scope['path']
+        for prefix, buckets in self.groups:
+            if path.startswith(prefix):
+                key = self.client_key(scope)
+                if path == LOGIN_PATH and scope['method'] == 'POST':
+                    body = await IdempotencyMiddleware.read_body(receive)
+                    receive = self.replay_body(body, receive)
+                    key = key, self.login_username(body)
+                wait = buckets.acquire(key)
+                if wait:
+                    await self.reject(send, wait)
+                    return
+                break
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def client_key(scope) -> Hashable:
+        for name, value in scope['headers']:
+            if name == b'authorization':
+                scheme, _, token = value.decode('latin-1').partition(' ')
+                if scheme.lower() == 'bearer':
+                    user_id = token_cache.get(token)
+                    if user_id is not None:
+                        return 'user', user_id
+                break
+        client = scope.get('client')
+        return 'ip', client[0] if client else None
+
+    @staticmethod
+    def login_username(body: bytes) -> str:
+        username = parse_qs(body.decode('latin-1')).get('username', [''])
+        return username[0].lower()
+
+    @staticmethod
+    def replay_body(body: bytes, receive):
+        body_received = False
+
+        async def receive_body():
+            nonlocal body_received
+            if body_received:
+                return await receive()
+            body_received = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        return receive_body
+
+    @staticmethod
+    async def reject(send, wait: float) -> None:
+        body = json.dumps(
+            {'detail': 'Слишком много запросов!'}, ensure_ascii=False
+        ).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 429,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,230 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable, Optional
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from sqlalchemy import event, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.models import Task, User
+
+logger = logging.getLogger(__name__)
+
+PENDING_REMINDERS_KEY = 'pending_reminders'
+REMINDER_TEXT = 'Напоминание: срок задачи «{name}» - {due_at:%d.%m.%Y %H:%M}'
+
+Notify = Callable[[int, str], Awaitable[None]]
+
+
+class TelegramNotifier:
+    """Отправка сообщений в чат через Bot API Telegram."""
+
+    def __init__(self, token: str):
+        self.url = f'https://api.telegram.org/bot{token}/sendMessage'
+
+    async def __call__(self, chat_id: int, text: str) -> None:
+        data = urlencode({'chat_id': chat_id, 'text': text}).encode()
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.send, data
+        )
+
+    def send(self, data: bytes) -> None:
+        with urlopen(self.url, data=data, timeout=10) as response:
+            response.read()
+
+
+async def log_notifier(chat_id: int, text: str) -> None:
+    """Заглушка вместо бота: напоминание только пишется в лог."""
+    logger.info('Напоминание для чата %s: %s', chat_id, text)
+
+
+class ReminderScheduler:
+    """
+    Отправка напоминаний о сроках задач.
+
+    Из БД по частичному индексу ix_task_due_at_pending загружаются
+    только напоминания ближайших window секунд (не больше batch_size),
+    в памяти они лежат в куче по времени. Окно перечитывается раз
+    в reload секунд; задачи, созданные или изменённые в этом процессе,
+    попадают в кучу сразу после коммита.
+
+    Перед отправкой напоминание помечается в БД (reminded_at)
+    условным UPDATE, поэтому после перезапуска или при нескольких
+    воркерах оно не отправляется повторно. Сбой между пометкой
+    и отправкой теряет напоминание: доставка не больше одного раза.
+    """
+
+    def __init__(
+            self,
+            notify: Notify,
+            window: float,
+            reload: float,
+            batch_size: int
+    ):
+        self.notify = notify
+        self.window = timedelta(seconds=window)
+        self.reload = timedelta(seconds=reload)
+        self.batch_size = batch_size
+        self.heap = []
+        self.scheduled = set()
+        # Граница загруженного окна; None - планировщик не запущен
+        self.loaded_until: Optional[datetime] = None
+        self.wakeup: Optional[asyncio.Event] = None
+
+    def schedule(self, task_id: int, due_at: Optional[datetime]) -> None:
+        """Добавление напоминания, попадающего в загруженное окно."""
+        if (
+            self.loaded_until is None or due_at is None or
+            due_at > self.loaded_until
+        ):
+            return
+        self.push(task_id, due_at)
+        self.wakeup.set()
+
+    def push(self, task_id: int, due_at: datetime) -> None:
+        entry = (due_at, task_id)
+        if entry not in self.scheduled:
+            self.scheduled.add(entry)
+            heapq.heappush(self.heap, entry)
+
+    async def load(self, now: datetime) -> None:
+        """Загрузка неотправленных напоминаний до now + window."""
+        horizon = now + self.window
+        async with AsyncSessionLocal() as session:
+            reminders = await session.execute(
+                select(Task.id, Task.due_at).where(
+                    Task.reminded_at.is_(None),
+                    Task.due_at <= horizon
+                ).order_by(Task.due_at).limit(self.batch_size)
+            )
+            reminders = reminders.all()
+        for task_id, due_at in reminders:
+            self.push(task_id, due_at)
+        if len(reminders) == self.batch_size:
+            horizon = reminders[-1].due_at
+        self.loaded_until = horizon
+
+    async def claim(self, due: list[tuple[datetime, int]]) -> list:
+        """
+        Пометка напоминаний отправленными.
+
+        Возвращает чаты и задачи, напоминания которых помечены этим
+        вызовом. Напоминания задач, срок которых изменился или которые
+        удалены, пропускаются.
+        """
+        claimed_at = datetime.now()
+        task_ids = [task_id for _, task_id in due]
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Task).where(
+                    # Условие на id - поиск по первичному ключу: SQLite
+                    # не использует его для IN по кортежам
+                    Task.id.in_(task_ids),
+                    tuple_(Task.id, Task.due_at).in_(
+                        [(task_id, due_at) for due_at, task_id in due]
+                    ),
+                    Task.reminded_at.is_(None)
+                ).values(
+                    reminded_at=claimed_at,
+                    # Отправка напоминания не изменение задачи
+                    update_date=Task.update_date
+                ).execution_options(synchronize_session=False)
+            )
+            reminders = await session.execute(
+                select(User.telegram_chat_id, Task.name, Task.due_at).join(
+                    User, User.id == Task.user_id
+                ).where(
+                    Task.id.in_(task_ids),
+                    Task.reminded_at == claimed_at,
+                    User.telegram_chat_id.isnot(None)
+                )
+            )
+            reminders = reminders.all()
+            await session.commit()
+        return reminders
+
+    async def send_due(self, now: datetime) -> None:
+        while self.heap and self.heap[0][0] <= now:
+            due = []
+            while (
+                self.heap and self.heap[0][0] <= now and
+                len(due) < self.batch_size
+            ):
+                entry = heapq.heappop(self.heap)
+                self.scheduled.discard(entry)
+                due.append(entry)
+            for chat_id, name, due_at in await self.claim(due):
+                try:
+                    await self.notify(
+                        chat_id, REMINDER_TEXT.format(name=name, due_at=due_at)
+                    )
+                except OSError:
+                    logger.exception('Не удалось отправить напоминание')
+
+    async def run(self) -> None:
+        """Цикл планировщика, запускается задачей asyncio."""
+        self.wakeup = asyncio.Event()
+        next_load = datetime.now()
+        while True:
+            now = datetime.now()
+            try:
+                if now >= next_load:
+                    await self.load(now)
+                    next_load = min(now + self.reload, self.loaded_until)
+                await self.send_due(datetime.now())
+            except Exception:
+                # Ошибки подключения asyncpg приходят не как SQLAlchemyError,
+                # а задача планировщика не должна завершаться из-за сбоя БД
+                logger.exception('Не удалось обработать напоминания')
+                next_load = now + self.reload
+            deadline = next_load
+            if self.heap:
+                deadline = min(deadline, self.heap[0][0])
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self.wakeup.wait(),
+                    max((deadline - datetime.now()).total_seconds(), 0)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+reminder_scheduler = ReminderScheduler(
+    TelegramNotifier(settings.telegram_bot_token)
+    if settings.telegram_bot_token else log_notifier,
+    settings.reminder_window_seconds,
+    settings.reminder_reload_seconds,
+    settings.reminder_batch_size,
+)
+
+
+def schedule_after_commit(session, task: Task) -> None:
+    """Передача срока задачи планировщику после коммита."""
+    session.info.setdefault(PENDING_REMINDERS_KEY, []).append(task)
+
+
+def schedule_many_after_commit(
+        session,
+        reminders: Iterable[tuple[int, datetime]]
+) -> None:
+    """То же для пар (id задачи, срок), например при пакетной вставке."""
+    session.info.setdefault(PENDING_REMINDERS_KEY, []).extend(reminders)
+
+
+@event.listens_for(Session, 'after_commit')
+def schedule_committed_reminders(session):
+    for reminder in session.info.pop(PENDING_REMINDERS_KEY, []):
+        if isinstance(reminder, Task):
+            reminder = (reminder.id, reminder.due_at)
+        reminder_scheduler.schedule(*reminder)
+
+
+@event.listens_for(Session, 'after_rollback')
+def drop_uncommitted_reminders(session):
+    session.info.pop(PENDING_REMINDERS_KEY, None)
@@ -0,0 +1,197 @@
+import contextlib
+import math
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import partial
+from typing import AsyncIterator, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import LazySessionmaker, create_engine, get_async_session
+from app.core.user import current_user
+from app.models import User
+
+REPLICA_ERRORS = (exc.DBAPIError, exc.TimeoutError, OSError)
+# Cookie со временем (Unix time), до которого клиент читает из основной БД
+READ_PRIMARY_COOKIE = 'read_primary_until'
+
+
+class PrimaryPin:
+    """Срок чтения из основной БД, назначенный записью в текущем запросе."""
+    __slots__ = ('until',)
+
+    def __init__(self):
+        self.until = None
+
+
+request_primary_pin: ContextVar[Optional[PrimaryPin]] = ContextVar(
+    'request_primary_pin', default=None
+)
+
+
+class ReadRouter:
+    """
+    Выбор сессии для чтения.
+
+    Реплики перебираются по кругу, недоступная реплика исключается
+    на database_replica_retry_seconds. Пользователь, недавно
+    изменявший данные, читает из основной БД.
+
+    Запись отмечается в памяти процесса и в cookie ответа: следующий
+    запрос клиента может попасть в другой воркер. Клиент без cookie
+    защищён только в пределах одного процесса; срок в cookie -
+    время сервера, поэтому часы воркеров должны быть синхронизированы.
+    """
+
+    def __init__(self, replica_urls: list[str]):
+        self.replicas = [
+            LazySessionmaker(
+                partial(create_engine, url, f'replica{index}'),
+                class_=AsyncSession,
+                expire_on_commit=False,
+            )
+            for index, url in enumerate(replica_urls)
+        ]
+        self.unhealthy_until = [0.0] * len(self.replicas)
+        self.position = 0
+        self.recent_writers = OrderedDict()
+
+    def pin_to_primary(self, user_id: int) -> None:
+        """Чтение из основной БД после записи пользователя."""
+        if not self.replicas:
+            return
+        window = settings.database_read_your_writes_seconds
+        self.recent_writers[user_id] = time.monotonic() + window
+        self.recent_writers.move_to_end(user_id)
+        pin = request_primary_pin.get()
+        if pin is not None:
+            pin.until = time.time() + window
+
+    def is_pinned(self, user_id: int, pinned_until: float = 0) -> bool:
+        """
+        Нужно ли читать из основной БД.
+
+        pinned_until - срок из cookie клиента (см. get_pinned_until).
+        """
+        if pinned_until > time.time():
+            return True
+        now = time.monotonic()
+        # Окно одинаковое для всех, поэтому истёкшие записи - в начале
+        while self.recent_writers:
+            first_id, deadline = next(iter(self.recent_writers.items()))
+            if deadline > now:
+                break
+            del self.recent_writers[first_id]
+        return user_id in self.recent_writers
+
+    def healthy_replicas(self) -> list[int]:
+        now = time.monotonic()
+        count = len(self.replicas)
+        start = self.position
+        self.position = (self.position + 1) % count
+        return [
+            index for index in (
+                (start + offset) % count for offset in range(count)
+            )
+            if self.unhealthy_until[index] <= now
+        ]
+
+    @contextlib.asynccontextmanager
+    async def session(
+            self,
+            user_id: int,
+            primary_session: AsyncSession,
+            pinned_until: float = 0
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        Сессия реплики или primary_session.
+
+        primary_session - сессия запроса к основной БД: второе соединение
+        с основной БД на запрос могло бы исчерпать пул взаимной блокировкой.
+        """
+        if self.replicas and not self.is_pinned(user_id, pinned_until):
+            for index in self.healthy_replicas():
+                async with self.replicas[index]() as session:
+                    try:
+                        await session.connection()
+                    except REPLICA_ERRORS:
+                        self.unhealthy_until[index] = (
+                            time.monotonic()
+                            + settings.database_replica_retry_seconds
+                        )
+                        continue
+                    yield session
+                    return
+        yield primary_session
+
+
+read_router = ReadRouter(settings.database_replica_urls)
+
+
+def get_pinned_until(request: Request) -> float:
+    """Срок чтения из основной БД из cookie, не дальше окна."""
+    try:
+        pinned_until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+    except ValueError:
+        return 0
+    if pinned_until > time.time() + settings.database_read_your_writes_seconds:
+        return 0
+    return pinned_until
+
+
+async def get_read_session(
+        request: Request,
+        user: User = Depends(current_user),
+        primary_session: AsyncSession = Depends(get_async_session)
+):
+    """Сессия для эндпоинтов, которые только читают данные."""
+    async with read_router.session(
+        user.id, primary_session, get_pinned_until(request)
+    ) as session:
+        yield session
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI-middleware, передающее клиенту срок чтения из основной БД.
+
+    Если запрос записал данные, ответ ставит cookie READ_PRIMARY_COOKIE,
+    и get_read_session любого воркера направляет чтения в основную БД.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        pin = PrimaryPin()
+        token = request_primary_pin.set(pin)
+
+        async def send_with_cookie(message):
+            if (
+                message['type'] == 'http.response.start'
+                and pin.until is not None
+            ):
+                headers = list(message.get('headers', []))
+                headers.append((
+                    b'set-cookie',
+                    '{}={:.3f}; Max-Age={}; Path=/; HttpOnly; '
+                    'SameSite=lax'.format(
+                        READ_PRIMARY_COOKIE,
+                        pin.until,
+                        math.ceil(settings.database_read_your_writes_seconds)
+                    ).encode()
+                ))
+                message['headers'] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            request_primary_pin.reset(token)
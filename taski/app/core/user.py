@@ -1,16 +1,27 @@
-from typing import Optional, Union
+import time
+from typing import Any, Optional, Union
 
+import jwt
 from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import (
-    BaseUserManager, FastAPIUsers, IntegerIDMixin, InvalidPasswordException
+    BaseUserManager, FastAPIUsers, IntegerIDMixin, InvalidPasswordException,
+    exceptions
 )
 from fastapi_users.authentication import (
     AuthenticationBackend, BearerTransport, JWTStrategy
 )
+from fastapi_users.jwt import decode_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.password import (
+    hash_password, password_helper, verify_and_update_password
+)
 from app.core.db import get_async_session
 from app.models.user import User
 from app.schemas.user import UserCreate
@@ -22,10 +33,76 @@ async def get_user_db(session: AsyncSession = Depends(get_async_session)):
 
 bearer_transport = BearerTransport(tokenUrl='auth/jwt/login')
 
+# Кэш токен -> id пользователя и id -> поля пользователя. Кэш локален
+# для процесса: в других воркерах изменения видны через user_cache_ttl.
+token_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl)
+user_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Сброс закэшированных данных пользователя."""
+    user_cache.pop(user_id)
+
+
+def detached_user(values: dict[str, Any]) -> User:
+    """Отдельный для каждого запроса объект User из кэша."""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """JWT-стратегия, не обращающаяся к БД для известных токенов."""
+
+    def read_user_id(self, token: str) -> Optional[int]:
+        """id пользователя из действительного токена."""
+        user_id = token_cache.get(token)
+        if user_id is None:
+            try:
+                data = decode_jwt(
+                    token, self.decode_key, self.token_audience,
+                    algorithms=[self.algorithm]
+                )
+                user_id = int(data['sub'])
+            except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+                return None
+            expires = data.get('exp')
+            token_cache.set(
+                token, user_id,
+                ttl=None if expires is None else expires - time.time()
+            )
+        return user_id
+
+    async def read_token(
+            self,
+            token: Optional[str],
+            user_manager: BaseUserManager[User, int]
+    ) -> Optional[User]:
+        if token is None:
+            return None
+        user_id = self.read_user_id(token)
+        if user_id is None:
+            return None
+        values = user_cache.get(user_id)
+        if values is not None:
+            return detached_user(values)
+        try:
+            user = await user_manager.get(user_id)
+        except exceptions.UserNotExists:
+            return None
+        # Пользователь не привязан к сессии ни при промахе, ни при
+        # попадании в кэш, чтобы обработчики вели себя одинаково
+        user_manager.user_db.session.expunge(user)
+        user_cache.set(user_id, {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(User).column_attrs
+        })
+        return user
+
 
 def get_jwt_strategy() -> JWTStrategy:
     """Получение токена для пользоваетля."""
-    return JWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+    return CachedJWTStrategy(secret=settings.secret, lifetime_seconds=3600)
 
 
 auth_backend = AuthenticationBackend(
@@ -55,6 +132,71 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
                 reason='Password should not contain e-mail'
             )
 
+    async def create(
+            self,
+            user_create: UserCreate,
+            safe: bool = False,
+            request: Optional[Request] = None,
+    ) -> User:
+        """Создание пользователя с хэшированием пароля вне event loop."""
+        await self.validate_password(user_create.password, user_create)
+        if await self.user_db.get_by_email(user_create.email) is not None:
+            raise exceptions.UserAlreadyExists()
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        user_dict['hashed_password'] = await hash_password(
+            user_dict.pop('password')
+        )
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(
+            self, credentials: OAuth2PasswordRequestForm
+    ) -> Optional[User]:
+        """
+        Проверка e-mail и пароля вне event loop.
+
+        Если изменились алгоритм или стоимость хэширования,
+        хэш пароля пересчитывается.
+        """
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Хэширование выравнивает время ответа для несуществующих e-mail
+            await hash_password(credentials.password)
+            return None
+        verified, updated_hash = await verify_and_update_password(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if updated_hash is not None:
+            await self.user_db.update(user, {'hashed_password': updated_hash})
+            invalidate_user(user.id)
+        return user
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        password = update_dict.get('password')
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {
+                field: value for field, value in update_dict.items()
+                if field != 'password'
+            }
+            update_dict['hashed_password'] = await hash_password(password)
+        user = await super()._update(user, update_dict)
+        invalidate_user(user.id)
+        return user
+
+    async def on_after_delete(
+            self, user: User, request: Optional[Request] = None
+    ):
+        invalidate_user(user.id)
+
     async def on_after_register(
             self, user: User, request: Optional[Request] = None
     ):
@@ -64,7 +206,7 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     """Запуск менеджера пользователей."""
-    yield UserManager(user_db)
+    yield UserManager(user_db, password_helper)
 
 
 fastapi_users = FastAPIUsers[User, int](
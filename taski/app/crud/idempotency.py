@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.tag import DIALECT_INSERTS
+from app.models import IdempotencyKey
+
+
+class CRUDIdempotencyKey:
+    """Класс для операций с ключами идемпотентности."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def expired_before(self) -> datetime:
+        return datetime.now() - timedelta(
+            seconds=settings.idempotency_ttl_seconds
+        )
+
+    def new_lease(self) -> datetime:
+        """Срок резерва ключа для нового запроса."""
+        return datetime.now() + timedelta(
+            seconds=settings.idempotency_lock_seconds
+        )
+
+    async def reserve(
+            self,
+            user_id: int,
+            key: str,
+            fingerprint: str,
+            locked_until: datetime,
+            session: AsyncSession
+    ) -> Optional[IdempotencyKey]:
+        """
+        Резервирование ключа за выполняемым запросом до locked_until.
+
+        Возвращает None, если ключ зарезервирован, иначе - уже
+        существующую запись. Истёкшая запись заменяется новой,
+        просроченный резерв запроса с тем же телом перехватывается.
+        """
+        insert = DIALECT_INSERTS[session.bind.dialect.name]
+        for _ in range(2):
+            reserved = await session.execute(
+                insert(self.model).values(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=datetime.now(),
+                    locked_until=locked_until
+                ).on_conflict_do_nothing(index_elements=['user_id', 'key'])
+            )
+            if reserved.rowcount:
+                await session.commit()
+                return None
+            db_obj = await session.execute(
+                select(self.model).where(
+                    self.model.user_id == user_id, self.model.key == key
+                )
+            )
+            db_obj = db_obj.scalars().first()
+            if db_obj is not None and (
+                db_obj.created_at >= self.expired_before()
+            ):
+                if (
+                    db_obj.status_code is None
+                    and db_obj.fingerprint == fingerprint
+                    and (
+                        db_obj.locked_until is None
+                        or db_obj.locked_until <= datetime.now()
+                    )
+                ):
+                    # Условие на прежний срок: резерв перехватывает
+                    # только один из параллельных повторов
+                    taken = await session.execute(
+                        update(self.model).where(
+                            self.model.user_id == user_id,
+                            self.model.key == key,
+                            self.model.status_code.is_(None),
+                            self.model.locked_until == db_obj.locked_until
+                        ).values(locked_until=locked_until)
+                    )
+                    if taken.rowcount:
+                        await session.commit()
+                        return None
+                await session.commit()
+                return db_obj
+            await session.execute(
+                delete(self.model).where(
+                    self.model.user_id == user_id,
+                    self.model.key == key,
+                    self.model.created_at < self.expired_before()
+                )
+            )
+        await session.commit()
+        return db_obj
+
+    async def save(
+            self,
+            user_id: int,
+            key: str,
+            locked_until: datetime,
+            status_code: int,
+            body: bytes,
+            session: AsyncSession
+    ) -> None:
+        """
+        Сохранение ответа на запрос с ключом.
+
+        Ответ не сохраняется, если резерв перехвачен другим запросом.
+        """
+        await session.execute(
+            update(self.model).where(
+                self.model.user_id == user_id,
+                self.model.key == key,
+                self.model.locked_until == locked_until
+            ).values(status_code=status_code, body=body, locked_until=None)
+        )
+        await session.commit()
+
+    async def release(
+            self,
+            user_id: int,
+            key: str,
+            locked_until: datetime,
+            session: AsyncSession
+    ) -> None:
+        """Снятие резерва с ключа, запрос с которым не выполнен."""
+        await session.execute(
+            delete(self.model).where(
+                self.model.user_id == user_id,
+                self.model.key == key,
+                self.model.status_code.is_(None),
+                self.model.locked_until == locked_until
+            )
+        )
+        await session.commit()
+
+    async def remove_expired(self, session: AsyncSession) -> None:
+        """Удаление записей старше idempotency_ttl_seconds."""
+        await session.execute(
+            delete(self.model).where(
+                self.model.created_at < self.expired_before()
+            )
+        )
+        await session.commit()
+
+
+idempotency_crud = CRUDIdempotencyKey(IdempotencyKey)
@@ -1,9 +1,64 @@
-from typing import Optional
+from collections import OrderedDict
+from typing import Iterable, Optional, Union
 
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from app.models import Tag
+from app.core.config import settings
+from app.models import Tag, TagFacet, User
+
+DIALECT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+PENDING_TAGS_KEY = 'pending_tag_ids'
+
+
+class TagCache:
+    """
+    Кэш id тегов по названию в памяти процесса.
+
+    Теги нельзя изменить или удалить, поэтому записи не устаревают.
+    В кэш попадают только закоммиченные теги; при переполнении
+    вытесняются давно не использованные названия. max_id - граница
+    досинхронизации с тегами, созданными другими воркерами.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.ids = OrderedDict()
+        self.max_id = 0
+
+    def get(self, title: str) -> Optional[int]:
+        tag_id = self.ids.get(title)
+        if tag_id is not None:
+            self.ids.move_to_end(title)
+        return tag_id
+
+    def add(self, title: str, tag_id: int) -> None:
+        if self.maxsize <= 0:
+            return
+        self.ids[title] = tag_id
+        self.ids.move_to_end(title)
+        while len(self.ids) > self.maxsize:
+            self.ids.popitem(last=False)
+
+
+tag_cache = TagCache(settings.tag_cache_size)
+
+
+@event.listens_for(Session, 'after_commit')
+def cache_committed_tags(session):
+    """Перенос тегов, созданных в транзакции, в кэш после коммита."""
+    for title, tag_id in session.info.pop(PENDING_TAGS_KEY, {}).items():
+        tag_cache.add(title, tag_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def drop_uncommitted_tags(session):
+    session.info.pop(PENDING_TAGS_KEY, None)
 
 
 class CRUDTag:
@@ -14,14 +69,29 @@ class CRUDTag:
 
     async def get_multi(
         self,
-        session: AsyncSession
-    ) -> list[Tag]:
-        """Получение нескольких объектов из БД."""
+        session: AsyncSession,
+        as_rows: bool = False
+    ) -> Union[list[Tag], list[dict]]:
+        """
+        Получение нескольких объектов из БД.
+
+        При as_rows теги возвращаются словарями полей TagDB.
+        """
+        if as_rows:
+            titles = await session.execute(select(self.model.title))
+            return [{'title': title} for title in titles.scalars()]
         db_objs = await session.execute(
             select(self.model)
         )
         return db_objs.scalars().all()
 
+    async def get_version(self, session: AsyncSession) -> tuple:
+        """Версия списка тегов для ETag: теги только добавляются."""
+        version = await session.execute(
+            select(func.count(self.model.id), func.max(self.model.id))
+        )
+        return tuple(version.one())
+
     async def get(
             self,
             obj_id: int,
@@ -44,6 +114,8 @@ class CRUDTag:
         obj_in_data = obj_in.dict()
         db_obj = self.model(**obj_in_data)
         session.add(db_obj)
+        await session.flush()
+        self._remember([db_obj], session, pending=True)
         await session.commit()
         await session.refresh(db_obj)
         return db_obj
@@ -54,12 +126,185 @@ class CRUDTag:
         session: AsyncSession,
     ) -> Optional[Tag]:
         """Получение объекта по имени."""
+        tag_id = tag_cache.get(tag_title)
+        if tag_id is not None:
+            return await self._from_cache(tag_id, tag_title, session)
         db_tag = await session.execute(
             select(Tag).where(
                 Tag.title == tag_title
             )
         )
-        return db_tag.scalars().first()
+        db_tag = db_tag.scalars().first()
+        if db_tag is not None:
+            self._remember([db_tag], session)
+        return db_tag
+
+    async def _from_cache(
+        self,
+        tag_id: int,
+        title: str,
+        session: AsyncSession,
+    ) -> Tag:
+        """Объект Tag из кэша, привязанный к сессии без запроса в БД."""
+        tag = self.model(id=tag_id, title=title)
+        make_transient_to_detached(tag)
+        return await session.merge(tag, load=False)
+
+    def _remember(
+        self,
+        tags: Iterable[Tag],
+        session: AsyncSession,
+        pending: bool = False
+    ) -> None:
+        """
+        Запоминание найденных тегов.
+
+        Теги, созданные в текущей транзакции (pending), попадут в кэш
+        только после её коммита.
+        """
+        pending_ids = session.info.get(PENDING_TAGS_KEY, {})
+        if pending:
+            pending_ids = session.info.setdefault(PENDING_TAGS_KEY, {})
+        for tag in tags:
+            if pending or tag.title in pending_ids:
+                pending_ids[tag.title] = tag.id
+            else:
+                tag_cache.add(tag.title, tag.id)
+
+    async def get_ids_by_titles(
+        self,
+        titles: Iterable[str],
+        session: AsyncSession,
+    ) -> dict[str, int]:
+        """Получение id существующих тегов по названиям через кэш."""
+        tag_ids = {}
+        missing = []
+        for title in titles:
+            tag_id = tag_cache.get(title)
+            if tag_id is None:
+                missing.append(title)
+            else:
+                tag_ids[title] = tag_id
+        if missing:
+            tags = (await self.get_by_titles(missing, session)).values()
+            self._remember(tags, session)
+            tag_ids.update((tag.title, tag.id) for tag in tags)
+        return tag_ids
+
+    async def sync_cache(self, session: AsyncSession) -> None:
+        """
+        Досинхронизация кэша с тегами, созданными после прошлой.
+
+        Догружает теги с id больше tag_cache.max_id, в том числе созданные
+        другими воркерами; за вызов - не больше размера кэша.
+        """
+        new_tags = await session.execute(
+            select(self.model.id, self.model.title).where(
+                self.model.id > tag_cache.max_id
+            ).order_by(self.model.id).limit(tag_cache.maxsize)
+        )
+        for tag_id, title in new_tags:
+            tag_cache.add(title, tag_id)
+            tag_cache.max_id = tag_id
+
+    async def get_by_titles(
+        self,
+        titles: Iterable[str],
+        session: AsyncSession,
+    ) -> dict[str, Tag]:
+        """Получение объектов по списку названий одним запросом."""
+        db_tags = await session.execute(
+            select(self.model).where(self.model.title.in_(titles))
+        )
+        return {tag.title: tag for tag in db_tags.scalars().all()}
+
+    async def get_or_create_many(
+        self,
+        titles: Iterable[str],
+        session: AsyncSession,
+    ) -> list[Tag]:
+        """
+        Получение тегов по названиям с созданием недостающих.
+
+        Известные теги берутся из кэша без запроса в БД. Недостающие
+        вставляются одним запросом INSERT ... ON CONFLICT DO NOTHING,
+        поэтому параллельное создание одного и того же тега не нарушает
+        уникальность названия. Теги вставляются в порядке сортировки:
+        параллельные транзакции берут блокировки индекса в одном порядке
+        и не попадают во взаимную блокировку. Коммит остаётся за вызывающим.
+        """
+        titles = list(dict.fromkeys(titles))
+        tags = {}
+        uncached = []
+        for title in titles:
+            tag_id = tag_cache.get(title)
+            if tag_id is None:
+                uncached.append(title)
+            else:
+                tags[title] = await self._from_cache(tag_id, title, session)
+        if uncached:
+            found = await self.get_by_titles(uncached, session)
+            self._remember(found.values(), session)
+            tags.update(found)
+        missing = [title for title in titles if title not in tags]
+        if missing:
+            insert = DIALECT_INSERTS[session.bind.dialect.name]
+            await session.execute(
+                insert(self.model).values(
+                    [{'title': title} for title in sorted(missing)]
+                ).on_conflict_do_nothing(index_elements=['title'])
+            )
+            created = await self.get_by_titles(missing, session)
+            self._remember(created.values(), session, pending=True)
+            tags.update(created)
+        return [tags[title] for title in titles]
+
+    async def get_facets(
+        self,
+        session: AsyncSession,
+        user: User,
+    ) -> list:
+        """Получение тегов пользователя с количеством его задач по ним."""
+        db_facets = await session.execute(
+            select(self.model.title, TagFacet.count).join(
+                TagFacet, TagFacet.tag_id == self.model.id
+            ).where(
+                TagFacet.user_id == user.id
+            ).order_by(TagFacet.count.desc(), self.model.title)
+        )
+        return db_facets.mappings().all()
+
+    async def change_facets(
+        self,
+        user_id: int,
+        deltas: dict[int, int],
+        session: AsyncSession,
+    ) -> None:
+        """
+        Изменение счётчиков задач пользователя по тегам.
+
+        deltas сопоставляет id тега и изменение счётчика. Счётчики
+        обновляются одним UPSERT в текущей транзакции, обнулившиеся
+        удаляются. Коммит остаётся за вызывающим.
+        """
+        deltas = {tag_id: delta for tag_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        insert = DIALECT_INSERTS[session.bind.dialect.name]
+        upsert = insert(TagFacet).values([
+            {'user_id': user_id, 'tag_id': tag_id, 'count': delta}
+            for tag_id, delta in deltas.items()
+        ])
+        await session.execute(upsert.on_conflict_do_update(
+            index_elements=['user_id', 'tag_id'],
+            set_={'count': TagFacet.count + upsert.excluded.count}
+        ))
+        if any(delta < 0 for delta in deltas.values()):
+            await session.execute(delete(TagFacet).where(
+                TagFacet.user_id == user_id,
+                TagFacet.tag_id.in_(deltas),
+                TagFacet.count <= 0
+            ))
 
 
 tag_crud = CRUDTag(Tag)
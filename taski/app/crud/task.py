@@ -1,14 +1,50 @@
-from typing import Optional
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional, Union
 
-from fastapi import HTTPException
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select
+from sqlalchemy import (
+    column, delete, distinct, func, insert, literal_column, select, table,
+    tuple_, update
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models import Task, User, Tag
+from app.models import Task, TaskTombstone, User, Tag
+from app.models.base import task_tag
 
+from app.core.config import settings
+from app.core.reminders import (
+    schedule_after_commit, schedule_many_after_commit
+)
+from app.core.replicas import read_router
 from app.crud.tag import tag_crud
-from app.schemas.tag import TagCreate
+
+# Полнотекстовый индекс задач: FTS5-таблица в SQLite
+# и генерируемая колонка tsvector в PostgreSQL (см. миграцию 03).
+task_fts = table('task_fts', column('rowid'), column('rank'))
+task_search_vector = literal_column('task.search_vector')
+
+# Колонки задачи в порядке полей TaskDB для выборки строками,
+# теги добавляются последними
+TASK_ROW_COLUMNS = (
+    Task.name, Task.description, Task.id, Task.create_date, Task.update_date,
+    Task.due_at
+)
+TAGS_BATCH_SIZE = 500
+# Уникальность имени задачи в пределах пользователя: PostgreSQL сообщает
+# имя ограничения, SQLite - только его колонки.
+TASK_NAME_CONSTRAINT = 'uq_task_user_id_name'
+TASK_NAME_SQLITE_ERROR = 'UNIQUE constraint failed: task.user_id, task.name'
+
+
+def is_name_conflict(error: IntegrityError) -> bool:
+    """Вызвана ли ошибка занятым именем задачи."""
+    constraint = getattr(error.orig.__cause__, 'constraint_name', None)
+    if constraint is not None:
+        return constraint == TASK_NAME_CONSTRAINT
+    return TASK_NAME_SQLITE_ERROR in str(error.orig)
 
 
 class CRUDTask:
@@ -17,16 +53,192 @@ class CRUDTask:
     def __init__(self, model):
         self.model = model
 
+    def _select_with_tags(self):
+        """
+        Запрос задач вместе с тегами.
+
+        Теги подгружаются одним дополнительным запросом на каждые
+        500 задач выборки, а не запросом на каждую задачу.
+        """
+        return select(self.model).options(selectinload(self.model.tags))
+
+    def _select(self, as_rows: bool):
+        """Запрос задач: объектами с тегами или колонками TaskDB."""
+        if as_rows:
+            return select(*TASK_ROW_COLUMNS)
+        return self._select_with_tags()
+
+    async def _fetch(
+            self,
+            query,
+            session: AsyncSession,
+            as_rows: bool
+    ) -> Union[list[Task], list[dict]]:
+        """
+        Выполнение запроса из _select.
+
+        При as_rows задачи возвращаются словарями прямо из строк
+        результата, без ORM-объектов; названия тегов добираются
+        отдельным запросом по task_tag.
+        """
+        result = await session.execute(query)
+        if not as_rows:
+            return result.scalars().all()
+        # Пустые поля опускаются, как response_model_exclude_none
+        # в обычных ответах
+        rows = [
+            {key: value for key, value in row.items() if value is not None}
+            for row in result.mappings()
+        ]
+        titles = defaultdict(list)
+        for start in range(0, len(rows), TAGS_BATCH_SIZE):
+            task_ids = [
+                row['id'] for row in rows[start:start + TAGS_BATCH_SIZE]
+            ]
+            task_tags = await session.execute(
+                select(task_tag.c.task_id, Tag.title).join(
+                    Tag, Tag.id == task_tag.c.tag_id
+                ).where(task_tag.c.task_id.in_(task_ids))
+            )
+            for task_id, title in task_tags:
+                titles[task_id].append(title)
+        for row in rows:
+            row['tags'] = titles.get(row['id'], [])
+        return rows
+
+    async def get_version(
+            self,
+            session: AsyncSession,
+            user: User,
+            obj_id: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Версия задач пользователя для ETag.
+
+        User.task_version увеличивается в транзакции каждой записи,
+        поэтому версия меняется вместе с видимыми данными. С obj_id -
+        версия задачи, None - если задача не найдена.
+        """
+        if obj_id is None:
+            query = select(User.task_version).where(User.id == user.id)
+        else:
+            query = select(self.model.version).where(
+                self.model.id == obj_id,
+                self.model.user_id == user.id
+            )
+        return (await session.execute(query)).scalar()
+
+    async def _next_version(self, session: AsyncSession, user: User) -> int:
+        """
+        Увеличение версии задач пользователя.
+
+        UPDATE блокирует строку пользователя до конца транзакции, поэтому
+        записи одного пользователя получают версии в порядке коммитов.
+        Вызывается до остальных изменений, чтобы параллельные записи
+        ждали друг друга на одной блокировке.
+        """
+        bump = update(User).where(User.id == user.id).values(
+            task_version=User.task_version + 1
+        ).execution_options(synchronize_session=False)
+        if self._supports_returning(session):
+            version = await session.execute(bump.returning(User.task_version))
+        else:
+            await session.execute(bump)
+            version = await session.execute(
+                select(User.task_version).where(User.id == user.id)
+            )
+        return version.scalar_one()
+
     async def get_multi(
             self,
             session: AsyncSession,
-            user: User
-    ) -> list[Task]:
-        """Получение нескольких объектов из БД."""
-        db_objs = await session.execute(
-            select(self.model).where(self.model.user_id == user.id)
+            user: User,
+            after_id: Optional[int] = None,
+            limit: Optional[int] = None,
+            as_rows: bool = False
+    ) -> Union[list[Task], list[dict]]:
+        """
+        Получение нескольких объектов из БД.
+
+        Выборка идёт по индексу (user_id, id): after_id задаёт id последней
+        задачи предыдущей страницы, limit ограничивает размер страницы.
+        """
+        query = self._select(as_rows).where(
+            self.model.user_id == user.id
+        ).order_by(self.model.id)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        if limit is not None:
+            query = query.limit(limit)
+        return await self._fetch(query, session, as_rows)
+
+    async def get_changes(
+            self,
+            session: AsyncSession,
+            user: User,
+            updated_after: Optional[tuple[int, int]],
+            deleted_after: Optional[tuple[int, int]],
+            limit: int
+    ) -> tuple[list[Task], list[TaskTombstone], bool]:
+        """
+        Изменения задач пользователя после позиции курсора.
+
+        Изменённые задачи выбираются по индексу (user_id, version, id),
+        удалённые - по записям TaskTombstone. Версии записей одного
+        пользователя растут в порядке коммитов, поэтому запись, закоммиченная
+        после чтения, не окажется позади курсора. Оба потока сливаются
+        по версии, всего возвращается не больше limit записей.
+        Третье значение - есть ли ещё изменения.
+        """
+        tasks_query = self._select_with_tags().where(
+            self.model.user_id == user.id
+        ).order_by(self.model.version, self.model.id).limit(limit + 1)
+        if updated_after is not None:
+            tasks_query = tasks_query.where(
+                tuple_(self.model.version, self.model.id) >
+                tuple_(*updated_after)
+            )
+        tombstones_query = select(TaskTombstone).where(
+            TaskTombstone.user_id == user.id
+        ).order_by(TaskTombstone.version, TaskTombstone.id).limit(limit + 1)
+        if deleted_after is not None:
+            tombstones_query = tombstones_query.where(
+                tuple_(TaskTombstone.version, TaskTombstone.id) >
+                tuple_(*deleted_after)
+            )
+        tasks = (await session.execute(tasks_query)).scalars().all()
+        tombstones = (await session.execute(tombstones_query)).scalars().all()
+        changes = sorted(
+            [(task.version, 0, task.id, task) for task in tasks] +
+            [(tomb.version, 1, tomb.id, tomb) for tomb in tombstones],
+            key=lambda change: change[:3]
+        )
+        page = [change[3] for change in changes[:limit]]
+        return (
+            [change for change in page if isinstance(change, Task)],
+            [change for change in page if isinstance(change, TaskTombstone)],
+            len(changes) > limit
         )
-        return db_objs.scalars().all()
+
+    async def stream_multi(
+            self,
+            session: AsyncSession,
+            user: User,
+            chunk_size: int
+    ) -> AsyncIterator[Task]:
+        """
+        Потоковое получение всех объектов пользователя из БД.
+
+        Строки читаются серверным курсором пачками по chunk_size,
+        поэтому в памяти не держится весь результат запроса.
+        """
+        db_objs = await session.stream_scalars(
+            self._select_with_tags().where(
+                self.model.user_id == user.id
+            ).order_by(self.model.id).execution_options(yield_per=chunk_size)
+        )
+        async for db_obj in db_objs:
+            yield db_obj
 
     async def get(
             self,
@@ -36,7 +248,7 @@ class CRUDTask:
     ) -> Task:
         """Получение объекта их БД по id."""
         db_obj = await session.execute(
-            select(self.model).where(
+            self._select_with_tags().where(
                 self.model.id == obj_id,
                 self.model.user_id == user.id
             )
@@ -47,11 +259,18 @@ class CRUDTask:
             self,
             obj_in,
             session: AsyncSession,
-            user: User
+            user: User,
+            commit: bool = True
     ) -> Task:
-        """Создание объекта в БД."""
+        """
+        Создание объекта в БД.
+
+        При commit=False изменения только отправляются в БД (flush),
+        коммит остаётся за вызывающим.
+        """
         obj_in_data = obj_in.dict()
         obj_in_data['user_id'] = user.id
+        obj_in_data['version'] = await self._next_version(session, user)
 
         # Удаление поля tags из obj_in_data,
         # чтобы избежать ошибки при создании задачи
@@ -60,91 +279,392 @@ class CRUDTask:
         # Создание задачи
         db_obj = self.model(**obj_in_data)
 
-        # Обработка тегов
-        if tags:
-            for tag_title in tags:
-                tag = await tag_crud.get_tag_id_by_name(tag_title, session)
-                if not tag:
-                    tag = await tag_crud.create(
-                        TagCreate(title=tag_title),
-                        session
-                    )
-                db_obj.tags.append(tag)
+        # Обработка тегов: все теги разрешаются пакетно,
+        # задача и связи с тегами сохраняются одним коммитом
+        db_obj.tags = await tag_crud.get_or_create_many(tags or [], session)
+        await tag_crud.change_facets(
+            user.id, {tag.id: 1 for tag in db_obj.tags}, session
+        )
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
-
+        if db_obj.due_at is not None:
+            schedule_after_commit(session, db_obj)
+        await self._save(session, user, commit)
         return db_obj
 
-    async def update(
+    async def create_many(
             self,
-            db_obj,
-            obj_in,
+            objs_in: list,
             session: AsyncSession,
-            user: User
-    ):
-        """Обновление данных объекта."""
-        if db_obj.user_id != user.id:
-            raise HTTPException(
-                status_code=403,
-                detail="Not authorized to update this task"
+            user: User,
+            tag_ids: Optional[dict[str, int]] = None
+    ) -> list[Optional[int]]:
+        """
+        Пакетное создание объектов в БД одной транзакцией.
+
+        Возвращает id созданных задач в порядке objs_in, None - для задач,
+        имя которых уже занято. В tag_ids накапливаются id тегов,
+        разрешённых в предыдущих пакетах.
+        """
+        if tag_ids is None:
+            tag_ids = {}
+        try:
+            ids, new_tag_ids = await self._insert_many(
+                objs_in, session, user, tag_ids
+            )
+        except IntegrityError as error:
+            # Имя заняли параллельно - сохраняем задачи по одной,
+            # чтобы отклонить только конфликтующие.
+            await session.rollback()
+            if not is_name_conflict(error):
+                raise
+            if len(objs_in) == 1:
+                return [None]
+            ids = []
+            for obj_in in objs_in:
+                ids.extend(
+                    await self.create_many([obj_in], session, user, tag_ids)
+                )
+            return ids
+        await self.commit(session, user)
+        tag_ids.update(new_tag_ids)
+        return ids
+
+    async def _insert_many(
+            self,
+            objs_in: list,
+            session: AsyncSession,
+            user: User,
+            tag_ids: dict[str, int]
+    ) -> tuple[list[Optional[int]], dict[str, int]]:
+        """Вставка пакета задач и их связей с тегами через executemany."""
+        taken = set((await session.execute(
+            select(self.model.name).where(
+                self.model.user_id == user.id,
+                self.model.name.in_([obj_in.name for obj_in in objs_in])
             )
+        )).scalars().all())
+        new_objs = {}
+        for index, obj_in in enumerate(objs_in):
+            if obj_in.name not in taken:
+                taken.add(obj_in.name)
+                new_objs[index] = obj_in
+        if not new_objs:
+            return [None] * len(objs_in), {}
+        version = await self._next_version(session, user)
 
-        obj_data = jsonable_encoder(db_obj)
-        update_data = obj_in.dict(exclude_unset=True)
+        titles = {
+            title
+            for obj_in in new_objs.values()
+            for title in obj_in.tags or []
+        }
+        new_tag_ids = {
+            tag.title: tag.id for tag in await tag_crud.get_or_create_many(
+                sorted(titles.difference(tag_ids)), session
+            )
+        }
+        chunk_tag_ids = {**tag_ids, **new_tag_ids}
+        await session.execute(
+            insert(self.model),
+            [
+                {
+                    'user_id': user.id,
+                    'name': obj_in.name,
+                    'description': obj_in.description,
+                    'due_at': obj_in.due_at,
+                    'version': version,
+                }
+                for obj_in in new_objs.values()
+            ]
+        )
+        created = dict((await session.execute(
+            select(self.model.name, self.model.id).where(
+                self.model.user_id == user.id,
+                self.model.name.in_(
+                    [obj_in.name for obj_in in new_objs.values()]
+                )
+            )
+        )).all())
+        links = [
+            {
+                'task_id': created[obj_in.name],
+                'tag_id': chunk_tag_ids[title],
+            }
+            for obj_in in new_objs.values()
+            for title in dict.fromkeys(obj_in.tags or [])
+        ]
+        if links:
+            await session.execute(insert(task_tag), links)
+            await tag_crud.change_facets(
+                user.id, Counter(link['tag_id'] for link in links), session
+            )
+        schedule_many_after_commit(session, [
+            (created[obj_in.name], obj_in.due_at)
+            for obj_in in new_objs.values()
+            if obj_in.due_at is not None
+        ])
+        ids = [
+            created[new_objs[index].name] if index in new_objs else None
+            for index in range(len(objs_in))
+        ]
+        return ids, new_tag_ids
 
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
+    async def update(
+            self,
+            obj_id: int,
+            obj_in,
+            session: AsyncSession,
+            user: User,
+            commit: bool = True
+    ) -> Optional[Task]:
+        """
+        Обновление данных объекта.
+
+        Задача обновляется одним запросом UPDATE ... RETURNING с условием
+        на владельца. Возвращает None, если задача не найдена.
+        commit - как в create.
+        """
+        update_data = obj_in.dict(exclude_unset=True, exclude={'user_id'})
+        tags = update_data.pop('tags', None)
+        if 'due_at' in update_data:
+            # Новый срок - новое напоминание
+            update_data['reminded_at'] = None
+        update_data['version'] = await self._next_version(session, user)
+        db_obj = await self._update_returning(
+            update(self.model).where(
+                self.model.id == obj_id,
+                self.model.user_id == user.id
+            ).values(**update_data),
+            obj_id, session, user
+        )
+        if db_obj is None:
+            return None
+        if tags is not None:
+            new_tags = await tag_crud.get_or_create_many(tags, session)
+            old_ids = {tag.id for tag in db_obj.tags}
+            new_ids = {tag.id for tag in new_tags}
+            deltas = {tag_id: 1 for tag_id in new_ids - old_ids}
+            deltas.update({tag_id: -1 for tag_id in old_ids - new_ids})
+            await tag_crud.change_facets(user.id, deltas, session)
+            db_obj.tags = new_tags
+        if 'due_at' in update_data:
+            schedule_after_commit(session, db_obj)
+        await self._save(session, user, commit)
         return db_obj
 
     async def remove(
         self,
-        db_obj,
+        obj_id: int,
         session: AsyncSession,
-        user: User
-    ):
-        """Удаление объекта."""
-        if db_obj.user_id != user.id:
-            raise HTTPException(
-                status_code=403,
-                detail="Not authorized to delete this task"
-            )
-        await session.delete(db_obj)
-        await session.commit()
+        user: User,
+        commit: bool = True
+    ) -> Optional[Task]:
+        """
+        Удаление объекта.
+
+        Связи с тегами и задача удаляются запросами DELETE ... RETURNING
+        с условием на владельца. Возвращает None, если задача не найдена.
+        commit - как в create.
+        """
+        version = await self._next_version(session, user)
+        owned_id = select(self.model.id).where(
+            self.model.id == obj_id,
+            self.model.user_id == user.id
+        )
+        delete_task = delete(self.model).where(
+            self.model.id == obj_id,
+            self.model.user_id == user.id
+        )
+        if self._supports_returning(session):
+            deleted_tags = await session.execute(
+                select(Tag).from_statement(
+                    delete(task_tag).where(
+                        task_tag.c.tag_id == Tag.id,
+                        task_tag.c.task_id.in_(owned_id)
+                    ).returning(Tag.id, Tag.title)
+                )
+            )
+            tags = deleted_tags.scalars().all()
+            db_obj = await session.execute(
+                select(self.model).from_statement(
+                    delete_task.returning(*self.model.__table__.columns)
+                )
+            )
+            db_obj = db_obj.scalars().first()
+            if db_obj is None:
+                return None
+            set_committed_value(db_obj, 'tags', tags)
+        else:
+            db_obj = await self.get(obj_id, session, user)
+            if db_obj is None:
+                return None
+            await session.execute(
+                delete(task_tag).where(task_tag.c.task_id == obj_id)
+            )
+            await session.execute(delete_task)
+        await tag_crud.change_facets(
+            user.id, {tag.id: -1 for tag in db_obj.tags}, session
+        )
+        # Запись об удалении для клиентов, синхронизирующих изменения
+        session.add(
+            TaskTombstone(user_id=user.id, task_id=obj_id, version=version)
+        )
+        await self._save(session, user, commit)
         return db_obj
 
-    async def get_tasks_by_tag(
-        tag: str,
+    async def remove_expired_tombstones(self, session: AsyncSession) -> None:
+        """Удаление записей об удалении старше срока хранения."""
+        await session.execute(
+            delete(TaskTombstone).where(
+                TaskTombstone.deleted_at < datetime.now() - timedelta(
+                    seconds=settings.task_tombstone_retention_seconds
+                )
+            )
+        )
+        await session.commit()
+
+    async def commit(self, session: AsyncSession, user: User) -> None:
+        """Фиксация изменений пользователя."""
+        await session.commit()
+        # Следующие чтения пользователя идут в основную БД,
+        # пока реплики не догнали запись
+        read_router.pin_to_primary(user.id)
+
+    async def _save(
+            self,
+            session: AsyncSession,
+            user: User,
+            commit: bool
+    ) -> None:
+        if commit:
+            await self.commit(session, user)
+        else:
+            await session.flush()
+
+    def _supports_returning(self, session: AsyncSession) -> bool:
+        """Поддерживает ли диалект БД UPDATE/DELETE ... RETURNING."""
+        return session.bind.dialect.full_returning
+
+    async def _update_returning(
+            self,
+            statement,
+            obj_id: int,
+            session: AsyncSession,
+            user: User
+    ) -> Optional[Task]:
+        """
+        Выполнение UPDATE задачи с получением её строки и тегов.
+
+        Если диалект не поддерживает RETURNING (SQLite), строка
+        дочитывается отдельным запросом.
+        """
+        if self._supports_returning(session):
+            db_obj = await session.execute(
+                select(self.model).from_statement(
+                    statement.returning(*self.model.__table__.columns)
+                ).options(
+                    selectinload(self.model.tags)
+                ).execution_options(populate_existing=True)
+            )
+            return db_obj.scalars().first()
+        result = await session.execute(statement)
+        if not result.rowcount:
+            return None
+        db_obj = await session.execute(
+            self._select_with_tags().where(
+                self.model.id == obj_id,
+                self.model.user_id == user.id
+            ).execution_options(populate_existing=True)
+        )
+        return db_obj.scalars().first()
+
+    async def get_tasks_by_tags(
+        self,
+        tags: list[str],
         session: AsyncSession,
-        user: User
-    ) -> list[Task]:
-        """Получение задач по тегу."""
-        result = await session.execute(
-            select(Task).join(Task.tags).where(
-                Tag.title == tag,
-                Task.user_id == user.id
+        user: User,
+        match_all: bool = True,
+        as_rows: bool = False
+    ) -> Union[list[Task], list[dict]]:
+        """
+        Получение задач по списку тегов.
+
+        При match_all задача должна содержать все теги, иначе - любой.
+        id тегов берутся из кэша, выборка идёт по индексу task_tag(tag_id).
+        """
+        tags = list(dict.fromkeys(tags))
+        tag_ids = await tag_crud.get_ids_by_titles(tags, session)
+        if not tag_ids or match_all and len(tag_ids) < len(tags):
+            return []
+        matched_ids = select(task_tag.c.task_id).where(
+            task_tag.c.tag_id.in_(tag_ids.values())
+        ).group_by(task_tag.c.task_id)
+        if match_all:
+            matched_ids = matched_ids.having(
+                func.count(distinct(task_tag.c.tag_id)) == len(tags)
             )
+        return await self._fetch(
+            self._select(as_rows).where(
+                self.model.id.in_(matched_ids),
+                self.model.user_id == user.id
+            ).order_by(self.model.id),
+            session, as_rows
         )
-        return result.scalars().all()
 
-    async def get_task_id_by_name(
+    async def search(
+            self,
+            query: str,
+            session: AsyncSession,
+            user: User,
+            offset: int = 0,
+            limit: Optional[int] = None
+    ) -> list[Task]:
+        """
+        Полнотекстовый поиск задач по названию и описанию.
+
+        Результаты отсортированы по релевантности.
+        """
+        if session.bind.dialect.name == 'postgresql':
+            ts_query = func.plainto_tsquery(
+                literal_column("'simple'::regconfig"), query
+            )
+            search_query = self._select_with_tags().where(
+                task_search_vector.op('@@')(ts_query)
+            ).order_by(
+                func.ts_rank(task_search_vector, ts_query).desc(),
+                self.model.id
+            )
+        else:
+            # Каждое слово запроса ищется как фраза, чтобы спецсимволы
+            # FTS5 в пользовательском вводе не ломали запрос.
+            fts_query = ' '.join(
+                '"{}"'.format(word.replace('"', '""'))
+                for word in query.split()
+            )
+            search_query = self._select_with_tags().join(
+                task_fts, task_fts.c.rowid == self.model.id
+            ).where(
+                literal_column('task_fts').op('MATCH')(fts_query)
+            ).order_by(task_fts.c.rank, self.model.id)
+        search_query = search_query.where(
+            self.model.user_id == user.id
+        ).offset(offset).limit(limit)
+        db_objs = await session.execute(search_query)
+        return db_objs.scalars().all()
+
+    async def get_by_name(
         self,
         task_name: str,
         session: AsyncSession,
         user: User
-    ) -> Optional[int]:
-        """Получение объекта по имени."""
-        db_task_id = await session.execute(
-            select(Task.id).where(
-                Task.name == task_name,
-                Task.user_id == user.id
+    ) -> Optional[Task]:
+        """Получение объекта по имени по индексу (user_id, name)."""
+        db_obj = await session.execute(
+            self._select_with_tags().where(
+                self.model.user_id == user.id,
+                self.model.name == task_name
             )
         )
-        return db_task_id.scalars().first()
+        return db_obj.scalars().first()
 
 
 task_crud = CRUDTask(Task)
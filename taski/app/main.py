@@ -1,14 +1,91 @@
+import asyncio
+import logging
+
 from fastapi import FastAPI
 
 from app.api.routers import main_router
 from app.core.config import settings
+from app.core.db import AsyncSessionLocal
 from app.core.init_db import create_first_superuser
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.reminders import reminder_scheduler
+from app.core.replicas import ReadYourWritesMiddleware
+from app.crud.idempotency import idempotency_crud
+from app.crud.tag import tag_crud
+from app.crud.task import task_crud
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(job, interval: float, description: str):
+    """
+    Запуск job(session) в отдельной сессии сразу и затем раз в interval.
+
+    Любая ошибка задачи записывается в лог: сбой подключения к БД
+    не должен останавливать цикл навсегда.
+    """
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await job(session)
+        except Exception:
+            logger.exception('Не удалось %s', description)
+        await asyncio.sleep(interval)
+
+
+def create_app() -> FastAPI:
+    """
+    Создание приложения.
+
+    Движок БД создаётся при первой сессии. При запуске проверяется
+    только наличие суперпользователя; кэш тегов заполняется в фоне,
+    поэтому приложение начинает отвечать, не дожидаясь загрузки тегов.
+    """
+    app = FastAPI(title=settings.app_title)
+
+    app.include_router(main_router)
+    app.add_middleware(IdempotencyMiddleware)
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.on_event('startup')
+    async def startup():
+        await create_first_superuser()
+        app.state.periodic_jobs = [
+            asyncio.create_task(run_periodically(
+                tag_crud.sync_cache,
+                settings.tag_cache_sync_seconds,
+                'синхронизировать кэш тегов'
+            )),
+            asyncio.create_task(run_periodically(
+                idempotency_crud.remove_expired,
+                settings.idempotency_ttl_seconds / 24,
+                'удалить истёкшие ключи идемпотентности'
+            )),
+            asyncio.create_task(run_periodically(
+                task_crud.remove_expired_tombstones,
+                settings.task_tombstone_retention_seconds / 24,
+                'удалить устаревшие записи об удалении задач'
+            )),
+            asyncio.create_task(reminder_scheduler.run()),
+        ]
 
-app = FastAPI(title=settings.app_title)
+    @app.on_event('shutdown')
+    async def shutdown():
+        for job in app.state.periodic_jobs:
+            job.cancel()
+        await asyncio.gather(*app.state.periodic_jobs, return_exceptions=True)
 
-app.include_router(main_router)
+    return app
 
 
-@app.on_event('startup')
-async def startup():
-    await create_first_superuser()
+def __getattr__(name: str):
+    # app.main:app для uvicorn: приложение создаётся при первом
+    # обращении, а не при импорте модуля
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,3 +1,6 @@
+from .idempotency_key import IdempotencyKey  # noqa
 from .tag import Tag  # noqa
+from .tag_facet import TagFacet  # noqa
 from .task import Task  # noqa
+from .task_tombstone import TaskTombstone  # noqa
 from .user import User  # noqa
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Table, ForeignKey
+from sqlalchemy import Column, Table, ForeignKey, Index
 
 from app.core.db import Base
 
@@ -6,5 +6,6 @@ from app.core.db import Base
 task_tag = Table(
     'task_tag', Base.metadata,
     Column('task_id', ForeignKey('task.id'), primary_key=True),
-    Column('tag_id', ForeignKey('tag.id'), primary_key=True)
+    Column('tag_id', ForeignKey('tag.id'), primary_key=True),
+    Index('ix_task_tag_tag_id_task_id', 'tag_id', 'task_id')
 )
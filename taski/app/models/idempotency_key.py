@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+)
+
+from .base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Модель таблицы ответов на запросы с заголовком Idempotency-Key.
+
+    status_code пуст, пока первый запрос с ключом выполняется.
+    locked_until - срок резерва ключа этим запросом: после него
+    повтор запроса с тем же телом выполняется заново, так как
+    воркер мог завершиться, не сохранив ответ.
+    """
+    __tablename__ = 'idempotency_key'
+    __table_args__ = (
+        UniqueConstraint(
+            'user_id', 'key', name='uq_idempotency_key_user_id_key'
+        ),
+    )
+
+    user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    body = Column(LargeBinary)
+    locked_until = Column(DateTime)
+    created_at = Column(
+        DateTime, default=datetime.now, nullable=False, index=True
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Integer,
+    UniqueConstraint,
+)
+
+from .base import Base
+
+
+class TagFacet(Base):
+    """
+    Модель таблицы счётчиков задач пользователя по тегам.
+    """
+    __tablename__ = 'tag_facet'
+    __table_args__ = (
+        UniqueConstraint(
+            'user_id', 'tag_id', name='uq_tag_facet_user_id_tag_id'
+        ),
+    )
+
+    user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    tag_id = Column(Integer, ForeignKey('tag.id'), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
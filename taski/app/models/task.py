@@ -6,7 +6,10 @@ from sqlalchemy import (
     Integer,
     Text,
     ForeignKey,
-    DateTime
+    DateTime,
+    Index,
+    UniqueConstraint,
+    text
 )
 from sqlalchemy.orm import relationship
 
@@ -17,13 +20,31 @@ class Task(Base):
     """
     Модель таблицы задач.
     """
+    __table_args__ = (
+        Index('ix_task_user_id_id', 'user_id', 'id'),
+        Index('ix_task_user_id_version_id', 'user_id', 'version', 'id'),
+        UniqueConstraint('user_id', 'name', name='uq_task_user_id_name'),
+        # Только неотправленные напоминания: индекс не растёт
+        # вместе с историей задач
+        Index(
+            'ix_task_due_at_pending', 'due_at',
+            postgresql_where=text('reminded_at IS NULL'),
+            sqlite_where=text('reminded_at IS NULL'),
+        ),
+    )
+
     user_id = Column(Integer, ForeignKey('user.id'))
     user = relationship('User', back_populates='tasks')
-    name = Column(String(100), unique=True, nullable=False)
+    name = Column(String(100), nullable=False)
     description = Column(Text, nullable=False)
     tags = relationship("Tag", secondary=task_tag, back_populates='tasks')
     create_date = Column(DateTime, default=datetime.now, nullable=False)
     update_date = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    due_at = Column(DateTime, nullable=True)
+    # Время отправки напоминания о due_at
+    reminded_at = Column(DateTime, nullable=True)
+    # User.task_version на момент последней записи задачи
+    version = Column(Integer, nullable=False, server_default='0')
 
     def __repr__(self):
         return (
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+)
+
+from .base import Base
+
+
+class TaskTombstone(Base):
+    """
+    Модель таблицы записей об удалённых задачах для синхронизации.
+    """
+    __tablename__ = 'task_tombstone'
+    __table_args__ = (
+        Index(
+            'ix_task_tombstone_user_id_version_id',
+            'user_id', 'version', 'id'
+        ),
+    )
+
+    user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    task_id = Column(Integer, nullable=False)
+    deleted_at = Column(
+        DateTime, default=datetime.now, nullable=False, index=True
+    )
+    # User.task_version, с которой задача удалена
+    version = Column(Integer, nullable=False, server_default='0')
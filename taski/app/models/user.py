@@ -3,7 +3,9 @@ from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
 from sqlalchemy.orm import relationship
 
 from sqlalchemy import (
+    BigInteger,
     Column,
+    Integer,
     String
 )
 
@@ -14,3 +16,7 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     """Модель для таблицы Пользователи."""
     tasks = relationship('Task')
     telegram_username = Column(String(150), unique=True, nullable=True)
+    # Чат с ботом для напоминаний о сроках задач
+    telegram_chat_id = Column(BigInteger, nullable=True)
+    # Увеличивается в транзакции каждой записи задач пользователя
+    task_version = Column(Integer, nullable=False, server_default='0')
@@ -0,0 +1,60 @@
+from typing import Annotated, List, Literal, Union
+
+from pydantic import BaseModel, Extra, Field
+
+from app.schemas.task import TaskCreate, TaskDB, TaskUpdate
+
+MAX_BATCH_OPERATIONS = 100
+
+
+class BatchCreate(BaseModel):
+    """Операция создания задачи."""
+    op: Literal['create']
+    data: TaskCreate
+
+    class Config:
+        extra = Extra.forbid
+
+
+class BatchUpdate(BaseModel):
+    """Операция частичного обновления задачи."""
+    op: Literal['update']
+    id: int
+    data: TaskUpdate
+
+    class Config:
+        extra = Extra.forbid
+
+
+class BatchDelete(BaseModel):
+    """Операция удаления задачи."""
+    op: Literal['delete']
+    id: int
+
+    class Config:
+        extra = Extra.forbid
+
+
+BatchOperation = Annotated[
+    Union[BatchCreate, BatchUpdate, BatchDelete],
+    Field(discriminator='op')
+]
+
+
+class BatchRequest(BaseModel):
+    """Схема пакета операций над задачами."""
+    operations: List[BatchOperation] = Field(
+        ..., min_items=1, max_items=MAX_BATCH_OPERATIONS,
+        title='Операции, выполняемые по порядку в одной транзакции'
+    )
+
+
+class BatchOperationResult(BaseModel):
+    """Схема результата одной операции пакета."""
+    op: str
+    task: TaskDB
+
+
+class BatchResult(BaseModel):
+    """Схема для вывода результатов пакета операций."""
+    results: List[BatchOperationResult] = []
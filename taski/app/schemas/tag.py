@@ -40,3 +40,9 @@ class TagDB(TagBase):
 
     class Config:
         orm_mode = True
+
+
+class TagFacetDB(BaseModel):
+    """Схема для вывода тега с количеством задач пользователя."""
+    title: str
+    count: int
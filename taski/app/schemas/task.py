@@ -1,11 +1,18 @@
-from typing import Optional, List
+from typing import Any, Optional, List
 from datetime import datetime
 
-from pydantic import BaseModel, Field, Extra
+from pydantic import BaseModel, Field, Extra, validator
 
 from app.schemas.tag import TagDB
 
 
+def to_local_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Перевод времени с часовым поясом в локальное, как в БД."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
 class TaskBase(BaseModel):
     """Базовый класс для схем задачи."""
     name: Optional[str]
@@ -31,11 +38,18 @@ class TaskCreate(TaskBase):
     )
     description: str = Field(..., min_length=2)
     tags: Optional[List[str]] = Field(None, title='Список тегов')
+    due_at: Optional[datetime] = Field(None, title='Срок выполнения')
+
+    _due_at_to_local = validator('due_at', allow_reuse=True)(to_local_naive)
 
 
 class TaskUpdate(TaskBase):
     """Схема для обновления задачи."""
     user_id: int
+    tags: Optional[List[str]] = Field(None, title='Список тегов')
+    due_at: Optional[datetime] = Field(None, title='Срок выполнения')
+
+    _due_at_to_local = validator('due_at', allow_reuse=True)(to_local_naive)
 
 
 class TaskDB(TaskBase):
@@ -43,7 +57,36 @@ class TaskDB(TaskBase):
     id: Optional[int] = Field(0)
     create_date: Optional[datetime]
     update_date: Optional[datetime]
+    due_at: Optional[datetime]
     tags: Optional[List[str]]
 
+    @validator('tags', pre=True)
+    def tags_to_titles(cls, value):
+        """Преобразование объектов Tag в список названий."""
+        if value is None:
+            return value
+        return [tag if isinstance(tag, str) else tag.title for tag in value]
+
     class Config:
         orm_mode = True
+
+
+class TaskBulkError(BaseModel):
+    """Схема ошибки для строки пакетного создания задач."""
+    row: int
+    detail: Any
+
+
+class TaskBulkResult(BaseModel):
+    """Схема для вывода результата пакетного создания задач."""
+    created: int = 0
+    ids: List[int] = []
+    errors: List[TaskBulkError] = []
+
+
+class TaskChanges(BaseModel):
+    """Схема для вывода изменений задач после курсора синхронизации."""
+    updated: List[TaskDB] = []
+    deleted: List[int] = []
+    cursor: str
+    has_more: bool = False
@@ -1,6 +1,7 @@
 from typing import Optional
 
 from fastapi_users import schemas
+from pydantic import BaseModel, Field
 
 
 class UserRead(schemas.BaseUser[int]):
@@ -16,3 +17,11 @@ class UserCreate(schemas.BaseUserCreate):
 class UserUpdate(schemas.BaseUserUpdate):
     """Схема для обновления данных пользователя."""
     telegram_username: Optional[str]
+
+
+class TelegramLink(BaseModel):
+    """Схема для привязки Telegram-аккаунта."""
+    telegram_username: str = Field(..., min_length=1, max_length=150)
+    telegram_chat_id: Optional[int] = Field(
+        None, title='Чат с ботом для напоминаний'
+    )
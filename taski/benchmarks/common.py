@@ -0,0 +1,57 @@
+"""
+Общие функции бенчмарков.
+
+Модуль нужно импортировать до приложения: настройки задаются через
+окружение. Бенчмарки работают с БД из BENCH_DATABASE_URL, по умолчанию -
+с временной БД SQLite, и не трогают БД из .env.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+TASKI_DIR = Path(__file__).resolve().parents[1]
+TEMP_DIR = tempfile.mkdtemp(prefix='taski-bench-')
+atexit.register(shutil.rmtree, TEMP_DIR, ignore_errors=True)
+
+os.environ.update(
+    APP_TITLE='taski-bench',
+    DATABASE_URL=os.environ.get(
+        'BENCH_DATABASE_URL', f'sqlite+aiosqlite:///{TEMP_DIR}/bench.db'
+    ),
+    DATABASE_REPLICA_URLS='[]',
+    RATE_LIMITS='{}',
+)
+
+import httpx  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+
+PASSWORD = 'password'
+
+
+def migrate() -> None:
+    """Применение миграций alembic к БД бенчмарка."""
+    config = Config(str(TASKI_DIR / 'alembic.ini'))
+    config.set_main_option('script_location', str(TASKI_DIR / 'alembic'))
+    command.upgrade(config, 'head')
+
+
+def asgi_client() -> httpx.AsyncClient:
+    """Клиент, вызывающий приложение напрямую, без сети."""
+    from app.main import app
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url='http://bench'
+    )
+
+
+async def login(client: httpx.AsyncClient, email: str) -> dict:
+    """Регистрация и вход пользователя; возвращает заголовок с токеном."""
+    await client.post(
+        '/auth/register', json={'email': email, 'password': PASSWORD}
+    )
+    response = await client.post(
+        '/auth/jwt/login', data={'username': email, 'password': PASSWORD}
+    )
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
@@ -0,0 +1,82 @@
+"""
+Задержка event loop во время одновременных входов.
+
+Пока выполняются N входов через /auth/jwt/login, фоновая корутина
+засыпает на 5 мс и замеряет, насколько позже она просыпается.
+Для сравнения те же проверки паролей выполняются прямо в event loop,
+как делает fastapi-users без пула потоков.
+
+Запуск из каталога taski:
+    python -m benchmarks.login_loop_lag [--logins 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import PASSWORD, asgi_client, login, migrate
+
+TICK = 0.005
+
+
+class LoopLag:
+    """Замер опозданий event loop по таймеру."""
+
+    def __init__(self):
+        self.lags = []
+        self.running = True
+
+    async def run(self) -> None:
+        while self.running:
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            self.lags.append(time.perf_counter() - started - TICK)
+
+    def report(self, title: str, elapsed: float) -> None:
+        lags = sorted(self.lags)
+        print(
+            f'{title}: {elapsed * 1000:.0f} мс всего, задержка loop '
+            f'медиана {statistics.median(lags) * 1000:.1f} мс, '
+            f'p99 {lags[int(len(lags) * 0.99)] * 1000:.1f} мс, '
+            f'максимум {lags[-1] * 1000:.1f} мс'
+        )
+
+
+async def measure(title: str, make_calls) -> None:
+    lag = LoopLag()
+    ticker = asyncio.create_task(lag.run())
+    await asyncio.sleep(TICK * 2)
+    started = time.perf_counter()
+    await asyncio.gather(*make_calls())
+    elapsed = time.perf_counter() - started
+    lag.running = False
+    await ticker
+    lag.report(title, elapsed)
+
+
+async def main(logins: int) -> None:
+    from app.core.password import password_helper
+    email = 'bench@mail.ru'
+    async with asgi_client() as client:
+        await login(client, email)
+        form = {'username': email, 'password': PASSWORD}
+        await measure('пул потоков (приложение)', lambda: [
+            client.post('/auth/jwt/login', data=form)
+            for _ in range(logins)
+        ])
+    hashed = password_helper.hash(PASSWORD)
+
+    async def verify_inline():
+        password_helper.verify_and_update(PASSWORD, hashed)
+
+    await measure('в event loop', lambda: [
+        verify_inline() for _ in range(logins)
+    ])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logins', type=int, default=20)
+    args = parser.parse_args()
+    migrate()
+    asyncio.run(main(args.logins))
@@ -0,0 +1,88 @@
+"""
+Пропускная способность ограничителя частоты запросов.
+
+Замеряются списание токена в TokenBuckets и запрос через
+RateLimitMiddleware с пустым приложением за ним: по IP-адресу
+и по пользователю с известным токеном. Лимиты заведомо не
+достигаются, поэтому замер показывает стоимость самой проверки.
+Затем проверяется, что число корзин ограничено max_keys.
+
+Запуск из каталога taski:
+    python -m benchmarks.rate_limit [--requests 200000] [--keys 50000]
+"""
+import argparse
+import asyncio
+import time
+
+# Окружение бенчмарка задаётся до импорта приложения
+import benchmarks.common  # noqa: F401
+from app.core.rate_limit import RateLimitMiddleware, TokenBuckets
+from app.core.user import token_cache
+
+UNLIMITED = (1e9, 10 ** 9)
+
+
+def report(title: str, count: int, elapsed: float) -> None:
+    print(
+        f'{title}: {elapsed / count * 1e6:.2f} мкс, '
+        f'{count / elapsed:,.0f} в секунду'
+    )
+
+
+def bench_acquire(requests: int, keys: int) -> None:
+    buckets = TokenBuckets(*UNLIMITED, max_keys=keys)
+    started = time.perf_counter()
+    for index in range(requests):
+        buckets.acquire(index % keys)
+    report('TokenBuckets.acquire', requests, time.perf_counter() - started)
+
+
+async def noop_app(scope, receive, send):
+    pass
+
+
+async def bench_middleware(requests: int, keys: int) -> None:
+    middleware = RateLimitMiddleware(noop_app)
+    middleware.groups = [('/task', TokenBuckets(*UNLIMITED, max_keys=keys))]
+    ip_scopes = [
+        {
+            'type': 'http', 'path': '/task/', 'headers': [],
+            'client': (f'10.0.{index // 256}.{index % 256}', 1),
+        }
+        for index in range(min(keys, 65536))
+    ]
+    user_scopes = []
+    # Токены должны поместиться в кэш, иначе запрос считается по IP
+    for index in range(min(keys, token_cache.maxsize)):
+        token = f'token{index}'
+        token_cache.set(token, index)
+        user_scopes.append({
+            'type': 'http', 'path': '/task/', 'client': ('10.0.0.1', 1),
+            'headers': [(b'authorization', f'Bearer {token}'.encode())],
+        })
+    for title, app, scopes in (
+        ('без ограничителя', noop_app, ip_scopes),
+        ('по IP-адресу', middleware, ip_scopes),
+        ('по пользователю', middleware, user_scopes),
+    ):
+        started = time.perf_counter()
+        for index in range(requests):
+            await app(scopes[index % len(scopes)], None, None)
+        report(f'запрос {title}', requests, time.perf_counter() - started)
+
+
+def bench_eviction(keys: int) -> None:
+    buckets = TokenBuckets(*UNLIMITED, max_keys=keys)
+    for index in range(keys * 10):
+        buckets.acquire(index)
+    print(f'корзин после {keys * 10} ключей: {len(buckets.buckets)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--keys', type=int, default=50000)
+    args = parser.parse_args()
+    bench_acquire(args.requests, args.keys)
+    asyncio.run(bench_middleware(args.requests, args.keys))
+    bench_eviction(args.keys)
@@ -0,0 +1,110 @@
+"""
+Сериализация списка задач: обычный путь и fast_json.
+
+Обычный путь - ORM-объекты, проверка response_model=list[TaskDB]
+в pydantic и JSONResponse, как в GET /task/ без fast_json. Быстрый -
+строки выборки и ORJSONResponse. Отдельно замеряются выборка из БД
+и сериализация уже выбранных задач.
+
+Запуск из каталога taski:
+    python -m benchmarks.serialization [--tasks 10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import select
+
+# Окружение бенчмарка задаётся до импорта приложения
+from benchmarks.common import asgi_client, login, migrate
+from app.api.responses import fast_json_response
+from app.core.db import AsyncSessionLocal
+from app.crud.task import task_crud
+from app.main import app
+from app.models import User
+
+EMAIL = 'bench@mail.ru'
+
+
+async def seed(tasks: int) -> None:
+    async with asgi_client() as client:
+        headers = await login(client, EMAIL)
+        response = await client.post('/task/bulk', headers=headers, json=[
+            {
+                'name': f'task {index}',
+                'description': f'description of task {index}',
+                'tags': [f'tag{index % 50}', f'tag{index % 7}'],
+            }
+            for index in range(tasks)
+        ])
+        assert response.json()['created'] == tasks, response.text
+
+
+def list_response_field():
+    """Поле response_model эндпоинта GET /task/."""
+    return next(
+        route.response_field for route in app.routes
+        if getattr(route, 'path', None) == '/task/'
+        and 'GET' in route.methods
+    )
+
+
+async def median_time(coroutine_function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coroutine_function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def main(tasks: int, repeat: int) -> None:
+    await seed(tasks)
+    field = list_response_field()
+    async with AsyncSessionLocal() as session:
+        user = (await session.execute(
+            select(User).where(User.email == EMAIL)
+        )).scalar_one()
+
+        async def fetch_objects():
+            return await task_crud.get_multi(session, user)
+
+        async def fetch_rows():
+            return await task_crud.get_multi(session, user, as_rows=True)
+
+        objects = await fetch_objects()
+        rows = await fetch_rows()
+        assert len(objects) == len(rows) == tasks
+
+        async def serialize_objects():
+            content = await serialize_response(
+                field=field, response_content=objects, exclude_none=True
+            )
+            return JSONResponse(content).body
+
+        async def serialize_rows():
+            return fast_json_response(rows).body
+
+        for title, fetch, serialize in (
+            ('обычный путь', fetch_objects, serialize_objects),
+            ('fast_json', fetch_rows, serialize_rows),
+        ):
+            fetch_time = await median_time(fetch, repeat)
+            serialize_time = await median_time(serialize, repeat)
+            print(
+                f'{title}: выборка {fetch_time * 1000:.0f} мс, '
+                f'сериализация {serialize_time * 1000:.0f} мс '
+                f'({tasks / serialize_time:,.0f} задач в секунду)'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    migrate()
+    asyncio.run(main(args.tasks, args.repeat))
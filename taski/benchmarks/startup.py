@@ -0,0 +1,105 @@
+"""
+Время импорта приложения и холодного старта до первого ответа.
+
+Импорт app.main и запуск uvicorn выполняются в новых процессах,
+как при масштабировании или перезапуске воркера. Холодный старт -
+время от запуска uvicorn до первого ответа на GET /metrics. Первый
+запуск не учитывается: он создаёт суперпользователя из .env.
+
+Запуск из каталога taski:
+    python -m benchmarks.startup [--repeat 7] [--tags 100000]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from statistics import median
+
+from sqlalchemy import insert
+
+# Окружение бенчмарка задаётся до импорта приложения
+from benchmarks.common import TASKI_DIR, migrate
+from app.core.db import AsyncSessionLocal
+from app.models import Tag
+
+IMPORT_APP = (
+    'import time; started = time.perf_counter(); import app.main; '
+    'print(time.perf_counter() - started)'
+)
+
+
+async def seed_tags(count: int) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            insert(Tag), [{'title': f'tag{index}'} for index in range(count)]
+        )
+        await session.commit()
+
+
+def import_time() -> float:
+    """Время импорта app.main в новом процессе."""
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_APP], cwd=TASKI_DIR, env=os.environ,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def cold_start(app: str) -> float:
+    """Время от запуска uvicorn до первого ответа."""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'uvicorn', app,
+            '--port', str(port), '--log-level', 'warning',
+        ],
+        cwd=TASKI_DIR, env=os.environ,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(
+                    f'uvicorn завершился с кодом {server.returncode}'
+                )
+            try:
+                with urllib.request.urlopen(
+                    f'http://127.0.0.1:{port}/metrics', timeout=1
+                ) as response:
+                    response.read()
+                return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.002)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--tags', type=int, default=0)
+    parser.add_argument('--app', default='app.main:app')
+    args = parser.parse_args()
+    migrate()
+    if args.tags:
+        asyncio.run(seed_tags(args.tags))
+    imports = [import_time() for _ in range(args.repeat)]
+    print(f'импорт app.main: медиана {median(imports) * 1000:.0f} мс')
+    cold_start(args.app)
+    startups = [cold_start(args.app) for _ in range(args.repeat)]
+    print(
+        'холодный старт до первого ответа: '
+        f'медиана {median(startups) * 1000:.0f} мс'
+    )
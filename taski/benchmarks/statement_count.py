@@ -0,0 +1,114 @@
+"""
+Число запросов к БД на чтение задач с тегами.
+
+Для пользователей с 1, 100 и 10000 задач считаются запросы,
+выполненные за один вызов GET /task/, /task/{id} и /task/by_tag/{tag}
+(последний отдаёт все задачи пользователя). Теги загружаются одним
+запросом на каждые TAGS_BATCH_SIZE задач, без запроса на каждую задачу:
+число запросов за вычетом этих пачек не должно зависеть от числа задач,
+иначе бенчмарк завершается с ошибкой.
+
+Запуск из каталога taski:
+    python -m benchmarks.statement_count [--tasks 1 100 10000]
+"""
+import argparse
+import asyncio
+import math
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Окружение бенчмарка задаётся до импорта приложения
+from benchmarks.common import asgi_client, login, migrate
+from app.api.pagination import MAX_PAGE_SIZE
+from app.core.config import settings
+from app.crud.task import TAGS_BATCH_SIZE
+
+TAG = 'common'
+
+
+class StatementCounter:
+    """Счётчик запросов, выполненных всеми движками."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+async def seed(client, email: str, tasks: int) -> tuple[dict, int]:
+    headers = await login(client, email)
+    response = await client.post('/task/bulk', headers=headers, json=[
+        {
+            'name': f'task {index}',
+            'description': f'description of task {index}',
+            'tags': [TAG, f'tag{index % 50}'],
+        }
+        for index in range(tasks)
+    ])
+    assert response.json()['created'] == tasks, response.text
+    return headers, response.json()['ids'][0]
+
+
+async def count_statements(
+        client, counter, headers, url: str
+) -> tuple[int, int]:
+    """Число запросов и число задач в ответе."""
+    # Первый вызов заполняет кэши пользователей и тегов
+    await client.get(url, headers=headers)
+    counter.count = 0
+    response = await client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    tasks = response.json()
+    return counter.count, len(tasks) if isinstance(tasks, list) else 1
+
+
+async def main(sizes: list[int]) -> None:
+    counter = StatementCounter()
+    event.listen(Engine, 'before_cursor_execute', counter)
+    async with asgi_client() as client:
+        users = [
+            (tasks, *await seed(client, f'bench{tasks}@mail.ru', tasks))
+            for tasks in sizes
+        ]
+        counts = {}
+        for fast_json in (False, True):
+            settings.fast_json = fast_json
+            for tasks, headers, task_id in users:
+                for title, url in (
+                    ('список', f'/task/?limit={MAX_PAGE_SIZE}'),
+                    ('задача', f'/task/{task_id}'),
+                    ('по тегу', f'/task/by_tag/{TAG}'),
+                ):
+                    if fast_json and title == 'задача':
+                        continue
+                    count, rows = await count_statements(
+                        client, counter, headers, url
+                    )
+                    # Страница выбирает на одну задачу больше limit
+                    if title == 'список' and rows == MAX_PAGE_SIZE:
+                        rows += 1
+                    batches = math.ceil(rows / TAGS_BATCH_SIZE)
+                    counts.setdefault((fast_json, title), set()).add(
+                        count - batches
+                    )
+                    print(
+                        f'fast_json={fast_json} {title}, {tasks} задач: '
+                        f'{count} запросов, из них пачек тегов {batches}'
+                    )
+    unstable = [key for key, values in counts.items() if len(values) > 1]
+    if unstable:
+        raise SystemExit(
+            f'Число запросов зависит от числа задач: {unstable}'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--tasks', type=int, nargs='+', default=[1, 100, 10000]
+    )
+    args = parser.parse_args()
+    migrate()
+    asyncio.run(main(args.tasks))
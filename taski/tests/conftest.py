@@ -0,0 +1,95 @@
+"""
+Общие фикстуры тестов.
+
+Настройки приложения задаются до его импорта: тесты работают
+с временными БД и не трогают БД из .env. Тесты на PostgreSQL
+выполняются, если задан TEST_POSTGRES_URL: на этом сервере
+создаётся и после тестов удаляется отдельная база.
+"""
+import asyncio
+import contextlib
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+TASKI_DIR = Path(__file__).resolve().parents[1]
+TEMP_DIR = tempfile.mkdtemp(prefix='taski-tests-')
+SQLITE_URL = f'sqlite+aiosqlite:///{TEMP_DIR}/taski.db'
+
+os.environ.update(
+    APP_TITLE='taski-tests',
+    DATABASE_URL=SQLITE_URL,
+    DATABASE_REPLICA_URLS='[]',
+    RATE_LIMITS='{}',
+    # Кэши процесса общие для всех БД тестов
+    TAG_CACHE_SIZE='0',
+    USER_CACHE_SIZE='0',
+)
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+from sqlalchemy.exc import SQLAlchemyError  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+
+def migrate(database_url: str) -> None:
+    """Применение миграций alembic к БД."""
+    config = Config(str(TASKI_DIR / 'alembic.ini'))
+    config.set_main_option('script_location', str(TASKI_DIR / 'alembic'))
+    # alembic/env.py берёт адрес БД из окружения
+    os.environ['DATABASE_URL'] = database_url
+    try:
+        command.upgrade(config, 'head')
+    finally:
+        os.environ['DATABASE_URL'] = SQLITE_URL
+
+
+async def execute_autocommit(database_url, statement: str) -> None:
+    engine = create_async_engine(database_url, isolation_level='AUTOCOMMIT')
+    try:
+        async with engine.connect() as connection:
+            await connection.exec_driver_sql(statement)
+    finally:
+        await engine.dispose()
+
+
+@contextlib.contextmanager
+def postgres_database(server_url: str):
+    """Временная база на сервере PostgreSQL."""
+    url = make_url(server_url)
+    name = f'taski_test_{uuid.uuid4().hex[:8]}'
+    try:
+        asyncio.run(execute_autocommit(url, f'CREATE DATABASE {name}'))
+    except (OSError, SQLAlchemyError) as error:
+        pytest.skip(f'PostgreSQL недоступен: {error}')
+    try:
+        yield url.set(database=name).render_as_string(hide_password=False)
+    finally:
+        asyncio.run(execute_autocommit(url, f'DROP DATABASE {name}'))
+
+
+@pytest.fixture(scope='session', autouse=True)
+def remove_temp_dir():
+    yield
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session', params=['sqlite', 'postgresql'])
+def database_url(request):
+    """Адрес пустой БД с применёнными миграциями."""
+    if request.param == 'sqlite':
+        url = f'sqlite+aiosqlite:///{TEMP_DIR}/{uuid.uuid4().hex}.db'
+        migrate(url)
+        yield url
+        return
+    server_url = os.environ.get('TEST_POSTGRES_URL')
+    if not server_url:
+        pytest.skip('TEST_POSTGRES_URL не задан')
+    with postgres_database(server_url) as url:
+        migrate(url)
+        yield url
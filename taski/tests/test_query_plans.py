@@ -0,0 +1,218 @@
+"""
+Планы запросов горячих путей.
+
+Сценарий выполняется через API на наполненной БД, каждый выполненный
+запрос разбирается EXPLAIN (EXPLAIN QUERY PLAN в SQLite): задачи
+пользователя должны находиться по индексам, а не полным просмотром.
+"""
+import asyncio
+import contextlib
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.core.db import AsyncSessionLocal, create_engine
+from app.core.reminders import ReminderScheduler, log_notifier
+from app.main import app
+
+USERS = ('first@mail.ru', 'second@mail.ru')
+PASSWORD = 'password'
+TASKS_PER_USER = 300
+TAGS = 30
+# Полный просмотр таблицы; FTS5 и VALUES в SQLite просматриваются
+# по построению
+FULL_SCAN = re.compile(
+    r'\bSCAN (?!(\d+ )?CONSTANT ROW)(?!task_fts VIRTUAL TABLE)|Seq Scan'
+)
+EXPLAINED = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+HOT_PATHS = (
+    'create',
+    'create with idempotency key',
+    'bulk create',
+    'list',
+    'list next page',
+    'get',
+    'by name',
+    'by tag',
+    'by tags',
+    'search',
+    'changes',
+    'update',
+    'delete',
+    'changes after delete',
+    'batch',
+    'facets',
+    'reminders load',
+    'reminders claim',
+)
+
+
+class StatementLog:
+    """Запросы к БД по шагам сценария с параметрами первого выполнения."""
+
+    def __init__(self):
+        self.step = None
+        self.statements = defaultdict(dict)
+
+    def __call__(
+            self, conn, cursor, statement, parameters, context, executemany
+    ):
+        if self.step is None or not statement.lstrip().upper().startswith(
+            EXPLAINED
+        ):
+            return
+        if executemany:
+            parameters = parameters[0]
+        self.statements[self.step].setdefault(statement, parameters)
+
+    @contextlib.contextmanager
+    def record(self, step: str):
+        self.step = step
+        try:
+            yield
+        finally:
+            self.step = None
+
+
+async def login(client: httpx.AsyncClient, email: str) -> dict:
+    await client.post(
+        '/auth/register', json={'email': email, 'password': PASSWORD}
+    )
+    response = await client.post(
+        '/auth/jwt/login', data={'username': email, 'password': PASSWORD}
+    )
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+async def run_scenario(client: httpx.AsyncClient, log: StatementLog):
+    due_at = datetime.now()
+    for email in USERS:
+        headers = await login(client, email)
+        response = await client.post('/task/bulk', headers=headers, json=[
+            {
+                'name': f'task {index}',
+                'description': f'description {index} word',
+                'tags': [f'tag{index % TAGS}', f'tag{(index + 1) % TAGS}'],
+                'due_at': (due_at + timedelta(seconds=index)).isoformat(),
+            }
+            for index in range(TASKS_PER_USER)
+        ])
+        assert response.status_code == 200, response.text
+    task = {'name': 'new', 'description': 'description'}
+
+    async def call(step, method, url, **kwargs):
+        kwargs.setdefault('headers', headers)
+        with log.record(step):
+            response = await client.request(method, url, **kwargs)
+        assert response.status_code == 200, (step, response.text)
+        return response
+
+    await call('create', 'POST', '/task/', json={**task, 'tags': ['tag1']})
+    await call(
+        'create with idempotency key', 'POST', '/task/',
+        json={**task, 'name': 'idempotent'},
+        headers={**headers, 'Idempotency-Key': 'key'}
+    )
+    await call('bulk create', 'POST', '/task/bulk', json=[
+        {**task, 'name': 'bulk', 'tags': ['tag2']},
+        {**task, 'name': 'task 7'},
+    ])
+    response = await call('list', 'GET', '/task/', params={'limit': 10})
+    await call('list next page', 'GET', '/task/', params={
+        'limit': 10, 'after': response.headers['X-Next-Cursor']
+    })
+    task_id = response.json()[0]['id']
+    await call('get', 'GET', f'/task/{task_id}')
+    await call('by name', 'GET', '/task/by_name/task 7')
+    await call('by tag', 'GET', '/task/by_tag/tag3')
+    await call('by tags', 'GET', '/task/by_tag', params={
+        'tags': ['tag3', 'tag4'], 'mode': 'all'
+    })
+    await call('search', 'GET', '/task/search', params={'q': 'word'})
+    response = await call('changes', 'GET', '/task/changes', params={
+        'limit': 10
+    })
+    await call('update', 'PATCH', f'/task/{task_id}', json={
+        **task, 'name': 'updated', 'tags': ['tag9'], 'user_id': 0
+    })
+    await call('delete', 'DELETE', f'/task/{task_id + 1}')
+    await call('changes after delete', 'GET', '/task/changes', params={
+        'limit': 10, 'since': response.json()['cursor']
+    })
+    await call('batch', 'POST', '/batch', json={'operations': [
+        {'op': 'create', 'data': {**task, 'name': 'batch'}},
+        {'op': 'delete', 'id': task_id + 2},
+    ]})
+    await call('facets', 'GET', '/tag/facets')
+
+    scheduler = ReminderScheduler(
+        log_notifier, window=600, reload=60, batch_size=1000
+    )
+    with log.record('reminders load'):
+        await scheduler.load(datetime.now())
+    with log.record('reminders claim'):
+        await scheduler.send_due(datetime.now() + timedelta(seconds=10))
+
+
+async def explain(statements: dict, dialect: str) -> list:
+    """Планы запросов: список пар (запрос, строки плана)."""
+    plans = []
+    async with AsyncSessionLocal() as session:
+        connection = await session.connection()
+        if dialect == 'postgresql':
+            # На маленькой таблице полный просмотр дешевле индекса:
+            # запрещаем его, чтобы увидеть, есть ли подходящий индекс
+            await connection.exec_driver_sql('ANALYZE')
+            await connection.exec_driver_sql('SET enable_seqscan = off')
+            prefix, column = 'EXPLAIN ', 0
+        else:
+            prefix, column = 'EXPLAIN QUERY PLAN ', 3
+        for statement, parameters in statements.items():
+            rows = await connection.exec_driver_sql(
+                prefix + statement, parameters
+            )
+            plans.append((
+                ' '.join(statement.split()),
+                [row[column] for row in rows]
+            ))
+        await session.rollback()
+    return plans
+
+
+async def collect_plans(database_url: str) -> dict:
+    engine = create_engine(database_url)
+    log = StatementLog()
+    event.listen(engine.sync_engine, 'before_cursor_execute', log)
+    AsyncSessionLocal.configure(bind=engine)
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url='http://test'
+        ) as client:
+            await run_scenario(client, log)
+        return {
+            step: await explain(statements, engine.dialect.name)
+            for step, statements in log.statements.items()
+        }
+    finally:
+        AsyncSessionLocal.configure(bind=None)
+        await engine.dispose()
+
+
+@pytest.fixture(scope='session')
+def query_plans(database_url):
+    return asyncio.run(collect_plans(database_url))
+
+
+@pytest.mark.parametrize('step', HOT_PATHS)
+def test_hot_path_uses_indexes(query_plans, step):
+    plans = query_plans.get(step)
+    assert plans, f'{step}: запросы к БД не выполнялись'
+    full_scans = {
+        statement: plan for statement, plan in plans
+        if any(FULL_SCAN.search(line) for line in plan)
+    }
+    assert not full_scans
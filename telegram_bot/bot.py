@@ -1,4 +1,6 @@
 import logging
+from urllib.parse import quote
+
 import requests
 
 from aiogram import Bot, Dispatcher, types
@@ -6,6 +8,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.storage.memory import MemoryStorage
 
 from .keyboards import main_kb
+from .middlewares import ThrottlingMiddleware
 from .states import AuthState
 from .config import bot_env
 
@@ -16,6 +19,9 @@ logger = logging.getLogger(__name__)
 
 bot = Bot(bot_env.bot_token)
 dp = Dispatcher(storage=MemoryStorage())
+dp.message.middleware(
+    ThrottlingMiddleware(bot_env.throttle_rate, bot_env.throttle_burst)
+)
 
 
 @dp.message(commands=['start'])
@@ -82,7 +88,6 @@ async def process_password(message: types.Message, state: FSMContext):
 async def process_telegram_username(message: types.Message, state: FSMContext):
     telegram_username = message.text
     user_data = await state.get_data()
-    email = user_data['email']
     user_id = user_data['user_id']
 
     try:
@@ -90,7 +95,7 @@ async def process_telegram_username(message: types.Message, state: FSMContext):
             f"{bot_env.host}/auth/telegram",
             json={
                 "telegram_username": telegram_username,
-                "email": email
+                "telegram_chat_id": message.chat.id
             },
             headers={"Authorization": f"Bearer {user_data['access_token']}"}
         )
@@ -112,40 +117,23 @@ async def get_task_prompt(message: types.Message):
 @dp.message(lambda message: message.text.startswith('task:'))
 async def get_task_by_name(message: types.Message, state: FSMContext):
     user_data = await state.get_data()
-    user_id = user_data['user_id']
     access_token = user_data['access_token']
     task_name = message.text[len('task:'):].strip()
 
     try:
-        # Получаем все задачи пользователя
+        # Получаем задачу по точному названию
         response = requests.get(
-            f"{bot_env.host}/task/tasks",
-            params={"user_id": user_id},
+            f"{bot_env.host}/task/by_name/{quote(task_name, safe='')}",
             headers={"Authorization": f"Bearer {access_token}"}
         )
-        response.raise_for_status()
-        tasks = response.json()
-
-        # Ищем задачу по названию
-        task = next(
-            (task for task in tasks if task['name'] == task_name),
-            None
-        )
-
-        if task:
-            task_id = task['id']
-            # Получаем задачу по ID
-            response = requests.get(
-                f"{bot_env.host}/task/{task_id}",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            response.raise_for_status()
-            task_details = response.json()
-            await message.reply(
-                f"Задача найдена:\nНазвание: {task_details['name']}\n"
-                f"Описание: {task_details['description']}")
-        else:
+        if response.status_code == 404:
             await message.reply("Задача с таким названием не найдена.")
+            return
+        response.raise_for_status()
+        task = response.json()
+        await message.reply(
+            f"Задача найдена:\nНазвание: {task['name']}\n"
+            f"Описание: {task['description']}")
     except requests.RequestException as e:
         logger.error(f"Ошибка получения задачи: {e}")
         await message.reply("Ошибка получения задачи. Попробуйте снова.")
@@ -214,23 +202,23 @@ async def search_notes_prompt(message: types.Message):
 @dp.message(lambda message: message.text.startswith('#'))
 async def search_notes_process(message: types.Message, state: FSMContext):
     user_data = await state.get_data()
-    user_id = user_data['user_id']
     access_token = user_data['access_token']
-    tag = message.text.strip('#').split(',')
+    tags = [tag.strip() for tag in message.text.strip('#').split(',')]
 
     try:
+        # Ищем заметки, содержащие все перечисленные теги
         response = requests.get(
-            f"{bot_env.host}/task/by_tag/{tag}",
+            f"{bot_env.host}/task/by_tag",
             params={
-                "tag": tag,
-                "user_id": user_id
+                "tags": [tag for tag in tags if tag],
+                "mode": "all"
             },
             headers={"Authorization": f"Bearer {access_token}"}
         )
         response.raise_for_status()
         notes = response.json()
         notes_list = "\n".join(
-            [f"{note['id']}: {note['title']}" for note in notes]
+            [f"{note['id']}: {note['name']}" for note in notes]
         )
         await message.reply(f"Найденные заметки:\n{notes_list}")
     except requests.RequestException as e:
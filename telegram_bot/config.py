@@ -9,6 +9,8 @@ load_dotenv()
 class Config:
     bot_token: str = os.getenv('BOT_TOKEN')
     host: str = os.getenv('HOST')
+    throttle_rate: float = float(os.getenv('THROTTLE_RATE', 1))
+    throttle_burst: int = int(os.getenv('THROTTLE_BURST', 5))
 
 
 bot_env = Config()
@@ -0,0 +1,47 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничение частоты сообщений от одного пользователя.
+
+    Корзина токенов на пользователя: rate сообщений в секунду,
+    не больше burst подряд. Сообщения сверх лимита не обрабатываются
+    и не доходят до API.
+    """
+
+    def __init__(self, rate: float, burst: int, max_users: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        self.buckets = OrderedDict()
+
+    def allow(self, user_id: int) -> bool:
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(user_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        self.buckets[user_id] = (tokens - 1 if allowed else tokens, now)
+        if len(self.buckets) > self.max_users:
+            self.buckets.popitem(last=False)
+        return allowed
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = event.from_user
+        if user is not None and not self.allow(user.id):
+            logger.info('Сообщение от %s отброшено лимитом', user.id)
+            return None
+        return await handler(event, data)